@@ -0,0 +1,123 @@
+"""
+Startup cost of `cli.py status`: as it runs now, with the scraping stack
+imported by the commands that need it, against the same command with the
+deferred imports made eagerly beforehand (cli.py before they were deferred)
+
+    python benchmarks/bench_import.py --repeat 5
+"""
+import argparse
+import ast
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).absolute().parents[1]
+CLI = ROOT.joinpath("cli.py")
+
+IMPORT_TIME = re.compile(
+    r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| (?P<name>.*)$")
+
+# Imports the deferred modules (each one that can be imported here), then
+# runs cli.py as a script
+EAGER = """
+import importlib, runpy, sys
+for module in {modules!r}:
+    try:
+        importlib.import_module(module)
+    except Exception as e:
+        print(f"Not importable: {{module}} ({{e!r}})", file=sys.stderr)
+sys.argv = {argv!r}
+runpy.run_path({cli!r}, run_name="__main__")
+"""
+
+
+def deferred_imports() -> List[str]:
+    """Modules cli.py imports after parsing the arguments"""
+    tree = ast.parse(CLI.read_text(encoding="utf-8"))
+    parser_line = next(
+        node.lineno for node in tree.body if isinstance(node, ast.Assign)
+        and any(getattr(t, "id", None) == "parser" for t in node.targets))
+
+    modules = []
+    for node in ast.walk(tree):
+        if getattr(node, "lineno", 0) <= parser_line:
+            continue
+        if isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+        elif isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+    return [*dict.fromkeys(modules)]
+
+
+def run(command: List[str]) -> Tuple[float, Dict[str, int], List[str]]:
+    """Wall time, cumulative import time (us) of top-level modules, errors"""
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *command], cwd=ROOT,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - started
+
+    imports, errors = {}, []
+    for line in process.stderr.splitlines():
+        if match := IMPORT_TIME.match(line):
+            name = match.group("name")
+            if not name.startswith(" "):  # Nested imports count in their parent
+                imports[name] = int(match.group("cumulative"))
+        elif line.startswith("Not importable") or process.returncode:
+            errors.append(line)
+    return elapsed, imports, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dois", type=int, default=1000,
+                        help="Size of the synthetic DOI list")
+    parser.add_argument("--top", type=int, default=5,
+                        help="Slowest imports shown for each mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        doi_file = Path(tmp, "dois.txt")
+        rng = random.Random(0)
+        doi_file.write_text("\n".join(
+            f"10.{rng.randint(1000, 9999)}/{rng.randint(10**5, 10**7)}"
+            for _ in range(args.dois)), encoding="utf-8")
+        argv = ["cli.py", "status", "--path", f"{doi_file}", "--format", "TXT",
+                "--output", f"{Path(tmp, 'output')}"]
+
+        modules = deferred_imports()
+        modes = {
+            "lazy": [f"{CLI}", *argv[1:]],
+            "eager": ["-c", EAGER.format(
+                modules=modules, argv=argv, cli=f"{CLI}")]}
+
+        print(f"cli.py status, {args.dois} DOIs, {args.repeat} runs "
+              f"(median), deferred imports: {', '.join(modules)}\n")
+        results = {}
+        for mode, command in modes.items():
+            runs = [run(command) for _ in range(args.repeat)]
+            wall = statistics.median(i[0] for i in runs)
+            imports = runs[-1][1]
+            total = statistics.median(sum(i[1].values()) for i in runs) / 1e6
+            results[mode] = wall
+
+            print(f"{mode:>5}: {wall:6.3f}s wall, {total:6.3f}s importing "
+                  f"{len(imports)} top-level modules")
+            for name, us in sorted(
+                    imports.items(), key=lambda i: -i[1])[:args.top]:
+                print(f"{'':>7}{us / 1e6:6.3f}s {name}")
+            for error in dict.fromkeys(runs[-1][2]):
+                print(f"{'':>7}{error}")
+
+        print(f"\nspeedup: {results['eager'] / results['lazy']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
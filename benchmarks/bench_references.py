@@ -0,0 +1,92 @@
+"""
+Throughput of the reference parser on a synthetic corpus: the sequential
+parse (parse_references per document) against parse_corpus's process pool
+
+    python benchmarks/bench_references.py --docs 2000 --references 40
+"""
+import argparse
+import random
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, f"{Path(__file__).absolute().parents[1]}")
+
+from utils.references import parse_corpus, parse_references  # noqa: E402
+
+# Only the attributes parse_corpus reads from a Document
+Doc = namedtuple("Doc", ["id", "references"])
+
+SURNAMES = ["Smith", "Nguyen", "Müller", "Silva", "Kowalski", "Tanaka",
+            "García", "O'Brien", "van der Berg", "Lee"]
+WORDS = ["learning", "visual", "analytics", "graph", "neural", "scalable",
+         "text", "corpus", "interactive", "retrieval", "model", "survey"]
+VENUES = ["IEEE Transactions on Visualization and Computer Graphics",
+          "Proceedings of the ACM CHI Conference", "BMC Bioinformatics",
+          "Journal of Machine Learning Research"]
+
+
+def synthetic_reference(rng: random.Random, n: int) -> str:
+    authors = [f"{rng.choice('ABCDEFGHJKLM')}. {rng.choice(SURNAMES)}"
+               for _ in range(rng.randint(1, 5))]
+    title = " ".join(rng.choices(WORDS, k=rng.randint(3, 10))).capitalize()
+    venue, year = rng.choice(VENUES), rng.randint(1980, 2023)
+    doi = f"10.{rng.randint(1000, 9999)}/{rng.randint(10**5, 10**7)}"
+
+    style = rng.randrange(3)
+    if style == 0:  # IEEE, ACM
+        return f'[{n}] {", ".join(authors)}, "{title}," {venue}, {year}, ' \
+            f'doi: {doi}.'
+    if style == 1:  # APA
+        apa = [f"{i.split(' ', 1)[1]}, {i.split(' ', 1)[0]}" for i in authors]
+        return f"{', '.join(apa)} ({year}). {title}. {venue}. " \
+            f"https://doi.org/{doi}"
+    vancouver = [f"{i.split(' ', 1)[1]} {i[0]}" for i in authors]
+    return f"{n}. {', '.join(vancouver)}. {title}. {venue}. {year};12:34-56."
+
+
+def synthetic_corpus(n_docs: int, n_references: int,
+                     seed: int = 0) -> List[Doc]:
+    rng = random.Random(seed)
+    return [
+        Doc(f"{i:032x}", [synthetic_reference(rng, j + 1)
+                          for j in range(n_references)])
+        for i in range(n_docs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--references", type=int, default=40,
+                        help="References per document")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Pool size (defaults to the number of CPUs)")
+    parser.add_argument("--chunksize", type=int, default=64)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.docs, args.references)
+    n_references = args.docs * args.references
+
+    started = time.perf_counter()
+    sequential = {doc.id: parse_references(doc.references) for doc in corpus}
+    sequential_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parallel = dict(parse_corpus(
+        corpus, processes=args.processes, chunksize=args.chunksize))
+    parallel_time = time.perf_counter() - started
+
+    assert parallel == sequential, "parse_corpus differs from the sequential parse"
+
+    print(f"{args.docs} documents, {n_references} references")
+    for name, elapsed in [("sequential", sequential_time),
+                          ("parse_corpus", parallel_time)]:
+        print(f"{name:>12}: {elapsed:7.2f}s  {args.docs / elapsed:9.1f} docs/s  "
+              f"{n_references / elapsed:10.1f} refs/s")
+    print(f"{'speedup':>12}: {sequential_time / parallel_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime
+from html import unescape
+from typing import Dict, Iterable, List
+
+from common.utils.text import extract_name, fix_text_wraps
+
+
+class IMetadataSource(ABC):
+    """
+    Bibliographic metadata obtained without visiting the publisher's page
+    - Fields found are not scraped again, the page is still visited for
+      the remaining ones (e.g. content)
+    """
+    @abstractmethod
+    def supports(self, doi: str) -> bool:
+        pass
+
+    @abstractmethod
+    def fetch(self, doi_list: Iterable[str]) -> Dict[str, Dict]:
+        """Document fields found for each DOI, DOIs not found are omitted"""
+        pass
+
+
+def fields_from_csl(record: Dict) -> Dict:
+    """Document fields from a CSL-JSON or Crossref record"""
+    def first(value) -> str:
+        if isinstance(value, list):
+            value = value[0] if value else None
+        return value or None
+
+    def date(record: Dict) -> datetime:
+        for key in ("issued", "published-print", "published-online",
+                    "published", "created"):
+            parts = record.get(key, {}).get("date-parts", [[None]])[0]
+            if parts and parts[0]:
+                parts = [*parts, 1, 1][:3]
+                return datetime(*[int(i) for i in parts])
+        return None
+
+    def author(author: Dict) -> str:
+        if "literal" in author:
+            return extract_name(author["literal"])
+        return extract_name(" ".join(filter(None, [
+            author.get("given"), author.get("family")])))
+
+    def reference(reference: Dict) -> str:
+        if "unstructured" in reference:
+            return fix_text_wraps(reference["unstructured"])
+        return ". ".join(filter(None, [
+            reference.get("author"),
+            reference.get("article-title") or reference.get("volume-title"),
+            reference.get("journal-title") or reference.get("series-title"),
+            reference.get("year"),
+            reference.get("DOI") and f"doi:{reference['DOI']}"]))
+
+    fields = dict(
+        title=first(record.get("title")),
+        authors=[author(i) for i in record.get("author", [])] or None,
+        abstract=fix_text_wraps(unescape(re.sub(
+            r"<[^<]+?>", r" ", record["abstract"]))).strip()
+        if record.get("abstract") else None,
+        citations=record.get("is-referenced-by-count"),
+        source=first(record.get("container-title")),
+        date=date(record),
+        references=[
+            reference(i) for i in record.get("reference", [])] or None)
+
+    return {field: value for field, value in fields.items() if value is not None}
+
+
+def fetch_all(sources: List[IMetadataSource],
+              doi_list: Iterable[str]) -> Dict[str, Dict]:
+    found: Dict[str, Dict] = {}
+    for source in sources:
+        dois = [
+            doi for doi in doi_list
+            if doi not in found and source.supports(doi)]
+        if dois:
+            found.update(source.fetch(dois))
+    return found
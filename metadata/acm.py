@@ -0,0 +1,52 @@
+from typing import Dict, Iterable, List
+
+import requests
+
+from metadata import IMetadataSource, fields_from_csl
+
+ACM_EXPORT = "https://dl.acm.org/action/exportCiteProcCitation"
+
+
+class ACMExport(IMetadataSource):
+    """
+    Citation export of the ACM Digital Library, which returns the CSL-JSON
+    records of many DOIs in a single request
+    - The export lacks content, references and citations, they are still
+      scraped from each landing page
+    """
+    PREFIXES: List[str] = ["10.1145/"]
+
+    def __init__(self, endpoint: str = ACM_EXPORT, batch_size: int = 50,
+                 timeout: int = 30, session: requests.Session = None):
+        self.__endpoint = endpoint
+        self.__batch_size = batch_size
+        self.__timeout = timeout
+        self.__session = session or requests.Session()
+
+    def supports(self, doi: str) -> bool:
+        return doi.lower().startswith(tuple(self.PREFIXES))
+
+    def fetch(self, doi_list: Iterable[str]) -> Dict[str, Dict]:
+        doi_list = [*doi_list]
+        found: Dict[str, Dict] = {}
+
+        for i in range(0, len(doi_list), self.__batch_size):
+            batch = doi_list[i:i + self.__batch_size]
+            try:
+                response = self.__session.post(
+                    self.__endpoint, timeout=self.__timeout, data=dict(
+                        dois=",".join(batch),
+                        targetFile="custom-bibtex", format="bibTex"))
+                response.raise_for_status()
+                items = response.json().get("items", [])
+            except (requests.RequestException, ValueError):
+                continue  # The landing pages are scraped instead
+
+            records = {
+                doi.lower(): record
+                for item in items for doi, record in item.items()}
+            for doi in batch:
+                if record := records.get(doi.lower()):
+                    found[doi] = fields_from_csl(record)
+
+        return found
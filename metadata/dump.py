@@ -0,0 +1,108 @@
+import gzip
+import json
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Tuple
+
+from metadata import IMetadataSource, fields_from_csl
+
+# Record keys read by fields_from_csl, the rest of the dump is not indexed
+KEYS: List[str] = [
+    "title", "author", "abstract", "container-title", "reference",
+    "is-referenced-by-count", "issued", "published-print",
+    "published-online", "published", "created"]
+
+
+class MetadataDump(IMetadataSource):
+    """
+    Crossref-style metadata snapshot (JSONL, optionally gzipped) indexed by
+    DOI in a SQLite database next to it
+    - The index is built in a single streaming pass the first time (or
+      when the dump is newer than the index)
+    - Records are stored compressed, keeping only the keys that are used
+    """
+
+    def __init__(self, dump: Path, index: Path = None,
+                 fields: List[str] = ["title", "authors", "date", "source",
+                                      "references"],
+                 batch_size: int = 10000):
+        self.__dump = Path(dump).absolute().resolve()
+        # Named after the full file name, dumps with the same stem do not collide
+        self.__index = Path(index or self.__dump.with_name(
+            f"{self.__dump.name}.sqlite")).absolute().resolve()
+        self.__fields = fields
+        self.__batch_size = batch_size
+
+        if not self.__index.is_file() or (
+                self.__index.stat().st_mtime < self.__dump.stat().st_mtime):
+            self.build()
+
+        self.__conn = sqlite3.connect(
+            f"file:{self.__index}?mode=ro", uri=True, check_same_thread=False)
+
+    def __del__(self):
+        if conn := getattr(self, "_MetadataDump__conn", None):
+            conn.close()
+
+    def __records(self) -> Generator[Dict, None, None]:
+        opener = gzip.open if self.__dump.suffix == ".gz" else open
+        with opener(self.__dump, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not (line := line.strip()):
+                    continue
+
+                record = json.loads(line)
+                if "items" in record:  # Crossref API pages
+                    yield from record["items"]
+                else:
+                    yield record
+
+    def __rows(self) -> Generator[Tuple[str, bytes], None, None]:
+        for record in self.__records():
+            if doi := record.get("DOI"):
+                yield doi.lower(), zlib.compress(json.dumps({
+                    key: record[key] for key in KEYS if key in record
+                }).encode("utf-8"))
+
+    def build(self) -> None:
+        tmp = self.__index.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+
+        conn = sqlite3.connect(f"{tmp}")
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(
+            "CREATE TABLE records (doi TEXT PRIMARY KEY, record BLOB) "
+            "WITHOUT ROWID")
+
+        rows = self.__rows()
+        while batch := [row for _, row in zip(range(self.__batch_size), rows)]:
+            conn.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?)", batch)
+            conn.commit()
+        conn.close()
+
+        tmp.replace(self.__index)
+
+    def supports(self, doi: str) -> bool:
+        return True
+
+    def fetch(self, doi_list: Iterable[str]) -> Dict[str, Dict]:
+        dois = {doi.lower(): doi for doi in doi_list}
+        keys = [*dois]
+        found: Dict[str, Dict] = {}
+
+        for i in range(0, len(keys), 500):  # SQLite's variable limit
+            batch = keys[i:i + 500]
+            rows = self.__conn.execute(
+                "SELECT doi, record FROM records WHERE doi IN "
+                f"({', '.join('?' * len(batch))})", batch)
+
+            for doi, record in rows:
+                fields = fields_from_csl(json.loads(zlib.decompress(record)))
+                found[dois[doi]] = {
+                    field: value for field, value in fields.items()
+                    if field in self.__fields}
+
+        return {doi: fields for doi, fields in found.items() if fields}
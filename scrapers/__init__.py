@@ -1,22 +1,53 @@
+import logging
 import re
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 from importlib.util import module_from_spec, spec_from_file_location
+from itertools import islice
 from pathlib import Path
-from typing import Coroutine, Dict, Generator, Iterable, List
+from typing import Callable, Coroutine, Deque, Dict, Generator, Iterable, List, Tuple
 from urllib.parse import urlparse
 
 import pandas as pd
+import requests
 from tqdm import tqdm
 
 from common.models.corpus import Corpus
 from common.models.document import Document
 from common.utils.text import extract_ngrams
-from utils.doi import doi_to_md5
+from metadata import IMetadataSource, fetch_all
+from sinks import ISink
+from sinks.directory import JSONDirectorySink
+from utils.citations import CitationGraph
+from utils.dtm import extract_dtm, write_dtm
+from utils.doi import DOI_RESOLVER, doi_to_md5, resolve_doi
+from utils.job_queue import JobQueue, default_worker_id
+from utils.minhash import MinHashLSH
+from utils.ngrams import document_ngrams
+from utils.validators import Probe, Validators
+from utils.references import parse_corpus, save_references
+from utils.search import InvertedIndex
+from utils.vocab import write_vocab
 from webdriver import ResponseStatus, WebDriver
+from webdriver.proxy import ProxyPool
+from webdriver.watchdog import Budget, DeadlineExceeded, Watchdog
+
+logger = logging.getLogger(__name__)
+
+PROBES = 8  # Conditional requests sent at once, ahead of the browser
 
 
 class IScraperStrategy(ABC):
+    FIELDS: List[str] = ["title", "authors", "content", "abstract",
+                         "citations", "source", "date", "references"]
+    # Rendered by scripts, a page not modified may still show new values
+    DYNAMIC_FIELDS: List[str] = ["citations"]
+
     @classmethod
     @abstractmethod
     def SUPPORTED_DOMAINS(cls) -> List[str]:
@@ -66,22 +97,34 @@ class IScraperStrategy(ABC):
     def references(self) -> List[str]:
         pass
 
-    def asdict(self) -> Dict:
-        return dict(
-            title=self.title,
-            authors=self.authors,
-            content=self.content,
-            abstract=self.abstract,
-            citations=self.citations,
-            source=self.source,
-            date=self.date,
-            references=self.references)
+    def asdict(self, skip: Iterable[str] = ()) -> Dict:
+        """
+        Properties may return a Future (e.g. a PDF being downloaded), which is
+        resolved by the Scraper while the browser moves on
+        - Fields in `skip` are already known and are not read from the page
+        """
+        return {
+            field: getattr(self, field)
+            for field in self.FIELDS if field not in skip}
 
 
 class Scraper:
     """
     Strategy design pattern
     - Concrete strategies must extend IScraperStrategy
+    - With `tabs` > 1 a single browser loads several DOIs concurrently,
+      documents are extracted in the order their pages finish loading
+    - With `prefetch` = K the next K DOIs are resolved in background threads
+      and, unless `tabs` > 1, their pages load in K standby tabs while the
+      current one is extracted (documents keep the input order)
+    - Each DOI must be done within its `budget`, otherwise the watchdog kills
+      the browser and the document is saved with a timeout error
+    - PDFs are fetched over HTTP by `downloads` background workers, at most
+      that many documents wait for their downloads at once
+    - `metadata` sources are queried in bulk before browsing, the fields
+      they provide are not read from the pages
+    - The browser is launched, and the strategies loaded, when the first DOI
+      is scraped, so there is no cost if nothing is pending
     """
     @classmethod
     def AVAILABLE_STRATEGIES(cls) -> Dict[str, IScraperStrategy]:
@@ -101,17 +144,52 @@ class Scraper:
             f"{name}": load_strategy_from_path(name, path).get_strategy()
             for name, path in strategies.items()}
 
-    def __init__(self):
-        self.__webdriver: WebDriver = WebDriver()
+    def __init__(self, download_dir: Path = None, proxies: ProxyPool = None,
+                 tabs: int = 1, prefetch: int = 0, budget: Budget = Budget(),
+                 downloads: int = 4, metadata: List[IMetadataSource] = []):
+        self.__budget = budget
+        self.__metadata = metadata
+        self.__known: Dict[str, Dict] = {}  # DOI -> fields from metadata
+        # DOI -> landing page already known, None if it need not be visited
+        self.__urls: Dict[str, str] = {}
+        self.__downloads = max(downloads, 1)
+        self.__download_dir = download_dir
+        self.__proxies = proxies
+        self.__webdriver: WebDriver = None  # Launched by the first DOI scraped
+        self.__watchdog = Watchdog(on_expire=self.__abort)
         self.__strategy: IScraperStrategy = None
+        self.__tabs = max(tabs, 1)
+        self.__prefetch = max(prefetch, 0)
+        self.__session = requests.Session()
 
-        self.__available_strategies = {
-            f"{name}": strategy(self.__webdriver)
-            for name, strategy in Scraper.AVAILABLE_STRATEGIES().items()
-        }
+        self.__available_strategies: Dict[str, IScraperStrategy] = {}
 
     def __del__(self):
-        del self.__webdriver
+        if self.__webdriver is not None:
+            del self.__webdriver
+
+    @property
+    def __browser(self) -> WebDriver:
+        if self.__webdriver is None:
+            self.__webdriver = WebDriver(
+                download_dir=self.__download_dir, proxies=self.__proxies,
+                page_load_timeout=self.__budget.load,
+                download_timeout=self.__budget.download,
+                download_workers=self.__downloads)
+
+            self.__available_strategies = {
+                f"{name}": strategy(self.__webdriver)
+                for name, strategy in Scraper.AVAILABLE_STRATEGIES().items()
+            }
+        return self.__webdriver
+
+    def __abort(self):
+        if self.__webdriver is not None:
+            self.__webdriver.abort()
+
+    @property
+    def stats(self) -> Dict:
+        return dict(proxies=self.__proxies.stats() if self.__proxies else [])
 
     def __set_strategy(self, url: str) -> bool:
         for strategy in self.__available_strategies.values():
@@ -122,41 +200,369 @@ class Scraper:
                 return True
         return False
 
+    def __extract(self, doi: str, skip: Iterable[str] = ()) -> Dict:
+        doc = dict(id=doi_to_md5(doi), doi=doi)
+        doc.update(known := self.__known.pop(doi, {}))
+        skip = [*skip, *known]
+
+        response: ResponseStatus = self.__browser.response
+        if response.status:
+            doc['url'] = self.__browser.url
+
+            if self.__set_strategy(doc['url']):
+                doc.update(self.__strategy.asdict(skip=skip))
+            else:
+                doc['error'] = f"Unsupported url: {doc['url']}"
+        else:
+            doc['error'] = f"Request error (Code {response.code})"
+
+        return doc
+
+    def __unvisited(self, doi: str) -> Dict:
+        """Document of a page that need not be visited, passed through"""
+        return dict(id=doi_to_md5(doi), doi=doi)
+
+    def __timed_out(self, doi: str, e: DeadlineExceeded) -> Dict:
+        return dict(id=doi_to_md5(doi), doi=doi, error=f"{e}",
+                    **self.__known.pop(doi, {}))
+
+    def __build(self, doc: Dict) -> Document:
+        doc_error = doc.pop("error", None)
+
+        for field, value in doc.items():
+            if not isinstance(value, Future):
+                continue
+            try:
+                doc[field] = value.result(timeout=self.__budget.download)
+            except FutureTimeoutError:
+                value.cancel()  # Still queued, never started
+                doc[field] = None
+                doc_error = f"{DeadlineExceeded('download', self.__budget.download)}"
+            except Exception as e:
+                doc[field] = None
+                doc_error = f"Download error ({field}): {e}"
+
+        doc = Document(**doc)
+        if doc_error:
+            doc.error = doc_error
+        return doc
+
     def get(self, doi_list: Iterable[str] | str) -> Generator[Document, None, None]:
         if isinstance(doi_list, str):
             doi_list = [doi_list]
 
+        if self.__metadata:
+            self.__known.update(fetch_all(
+                self.__metadata, [doi.strip() for doi in doi_list]))
+
         with tqdm(total=len(doi_list)) as pbar:
-            for doi in doi_list:
-                doi = doi.strip()
-                doc = dict(id=doi_to_md5(doi), doi=doi)
-                doc_error = None
-
-                pbar.set_description(f"Processing DOI ({doc['doi']})")
-                with self.__webdriver.get(f"https://doi.org/{doc['doi']}"):
-                    response: ResponseStatus = self.__webdriver.response
-                    if response.status:
-                        doc['url'] = self.__webdriver.url
-
-                        if self.__set_strategy(doc['url']):
-                            doc.update(self.__strategy.asdict())
-                        else:
-                            doc_error = f"Unsupported url: {doc['url']}"
+            yield from self.__build_all(self.__browse(doi_list, pbar), pbar)
+
+    def __browse(self, doi_list: Iterable[str], pbar: tqdm,
+                 skip: Iterable[str] = ()) -> Generator[Dict, None, None]:
+        if self.__tabs > 1:
+            return self.__get_tabs(doi_list, pbar, self.__tabs, skip=skip)
+        if self.__prefetch:
+            return self.__get_tabs(
+                doi_list, pbar, self.__prefetch + 1, ordered=True, skip=skip)
+        return self.__get_sequential(doi_list, pbar, skip=skip)
+
+    def __build_all(self, docs: Iterable[Dict],
+                    pbar: tqdm) -> Generator[Document, None, None]:
+        # Documents waiting for their downloads, yielded in order
+        downloading: Deque[Dict] = deque()
+
+        def done(doc: Dict) -> bool:
+            return not any(
+                isinstance(i, Future) and not i.done()
+                for i in doc.values())
+
+        for doc in docs:
+            downloading.append(doc)
+            while downloading and (done(downloading[0]) or
+                                   len(downloading) > self.__downloads):
+                yield self.__build(downloading.popleft())
+
+                if self.__webdriver and (proxy := self.__webdriver.proxy):
+                    pbar.set_postfix(proxy=proxy.url)
+                pbar.update(1)
+
+        while downloading:
+            yield self.__build(downloading.popleft())
+            pbar.update(1)
+
+    def refresh(self, documents: Iterable[Document], fields: List[str],
+                validators: Validators = None, total: int = None
+                ) -> Generator[Document, None, None]:
+        """
+        Re-reads `fields` of saved documents, the other fields are kept
+        - Pages are loaded as by get(), in the same session and tabs
+        - With `validators`, pages the publisher reports as not modified
+          (conditional request) are not visited, unless a field refreshed is
+          rendered by scripts (DYNAMIC_FIELDS), which validators do not cover
+        - Documents refreshed, or validated, get the `refreshed_at` time,
+          otherwise the reason is kept in `refresh_error`
+        """
+        skip = [i for i in IScraperStrategy.FIELDS if i not in fields]
+        if {*fields} & {*IScraperStrategy.DYNAMIC_FIELDS}:
+            validators = None
+
+        # DOI -> (document, url, probe) until it comes out of the browser
+        visiting: Dict[str, Tuple[Document, str, Probe]] = {}
+
+        def check(doc: Document) -> Tuple[Document, str, Probe]:
+            url = doc.url or f"{DOI_RESOLVER}/{doc.doi}"
+            return doc, url, validators.probe(url, self.__session) \
+                if validators else None
+
+        def pending() -> Generator[str, None, None]:
+            docs = iter(documents)
+            with ThreadPoolExecutor(PROBES) as pool:
+                checking: Deque[Future] = deque(
+                    pool.submit(check, doc) for doc in islice(docs, PROBES))
+                while checking:
+                    doc, url, probe = checking.popleft().result()
+                    if (following := next(docs, None)) is not None:
+                        checking.append(pool.submit(check, following))
+
+                    doi = doc.doi.strip()
+                    visiting[doi] = (doc, url, probe)
+                    # Not modified: passed through, the page is not visited
+                    self.__urls[doi] = None if probe and not probe.modified \
+                        else url
+                    yield doi
+
+        def refreshed(doc: Document, error: str = None) -> Document:
+            doc.refresh_error = error
+            if not error:
+                doc.refreshed_at = datetime.now().isoformat()
+            return doc
+
+        with tqdm(total=total) as pbar:
+            for extracted in self.__build_all(
+                    self.__browse(pending(), pbar, skip=skip), pbar):
+                doc, url, probe = visiting.pop(extracted.doi)
+                if probe and not probe.modified:
+                    yield refreshed(doc)
+                    continue
+
+                if not (error := getattr(extracted, "error", None)):
+                    for field in fields:  # Not found on the page: kept
+                        if (value := getattr(extracted, field)) is not None:
+                            setattr(doc, field, value)
+                    if probe:
+                        validators.update(url, probe)
+
+                yield refreshed(doc, error)
+
+    def __resolve(self, doi_list: Iterable[str]
+                  ) -> Generator[Tuple[str, str], None, None]:
+        """(DOI, landing page) in order, no page if it need not be visited"""
+        dois = (doi.strip() for doi in doi_list)
+
+        if not self.__prefetch:
+            for doi in dois:
+                yield doi, self.__urls.pop(doi, f"{DOI_RESOLVER}/{doi}")
+            return
+
+        def resolve(doi: str) -> str:
+            proxy = self.__proxies.acquire() if self.__proxies else None
+            return resolve_doi(
+                doi, self.__session, proxy=proxy.url if proxy else None)
+
+        with ThreadPoolExecutor(self.__prefetch) as pool:
+            resolving: Deque[Tuple[str, Future]] = deque()
+            for doi in dois:
+                if doi in self.__urls:
+                    url = Future()
+                    url.set_result(self.__urls.pop(doi))
+                else:
+                    url = pool.submit(resolve, doi)
+                resolving.append((doi, url))
+
+                if len(resolving) > self.__prefetch:
+                    doi, url = resolving.popleft()
+                    yield doi, url.result()
+
+            while resolving:
+                doi, url = resolving.popleft()
+                yield doi, url.result()
+
+    def __get_sequential(self, doi_list: Iterable[str], pbar: tqdm,
+                         skip: Iterable[str] = ()
+                         ) -> Generator[Dict, None, None]:
+        for doi, url in self.__resolve(doi_list):
+            if not url:
+                yield self.__unvisited(doi)
+                continue
+
+            pbar.set_description(f"Processing DOI ({doi})")
+            try:
+                with self.__watchdog.watch(self.__budget.total, "load"):
+                    with self.__browser.get(url):
+                        self.__watchdog.stage("extract")
+                        doc = self.__extract(doi, skip)
+            except DeadlineExceeded as e:
+                doc = self.__timed_out(doi, e)
+
+            yield doc
+
+    def __get_tabs(self, doi_list: Iterable[str], pbar: tqdm, tabs: int,
+                   ordered: bool = False, skip: Iterable[str] = ()
+                   ) -> Generator[Dict, None, None]:
+        pending = self.__resolve(doi_list)
+        # Pages to load again after a restart, or documents not yielded yet
+        retry: Deque[Tuple[str, str] | Dict] = deque()
+
+        # Time left to extract a document once its page is loaded
+        extract_budget = max(self.__budget.total - self.__budget.load,
+                             self.__budget.download)
+
+        while True:  # A new session whenever the watchdog kills the browser
+            # No browser is launched until a page must be visited
+            while retry and isinstance(retry[0], dict):
+                yield retry.popleft()
+            if not retry:
+                while (item := next(pending, None)) and not item[1]:
+                    yield self.__unvisited(item[0])
+                if not item:
+                    return
+                retry.append(item)
+
+            loading: Dict[str, Tuple[str, str]] = {}  # Tab -> (DOI, url)
+            # Tabs loading and documents done, in input order
+            queue: Deque[str | Dict] = deque()
+
+            def done() -> Generator[Dict, None, None]:
+                """Documents done, only those ahead of any tab if `ordered`"""
+                for item in [*queue]:
+                    if isinstance(item, str):
+                        if ordered:
+                            return
+                        continue
+                    queue.remove(item)
+                    yield item
+
+            def restart() -> None:
+                retry.extendleft(reversed([
+                    loading[i] if isinstance(i, str) else i for i in queue]))
+
+            with self.__browser.session():
+                idle = self.__browser.open_tabs(tabs)
+
+                exhausted = False
+                while True:
+                    # Bounded, documents done may wait behind a loading tab
+                    while idle and len(queue) <= tabs:
+                        if not (item := (
+                                retry.popleft() if retry else next(pending, None))):
+                            exhausted = True
+                            break
+                        if isinstance(item, dict) or not item[1]:
+                            queue.append(item if isinstance(item, dict)
+                                         else self.__unvisited(item[0]))
+                            continue
+                        handle = idle.pop()
+                        loading[handle] = item
+                        queue.append(handle)
+                        self.__browser.navigate(handle, item[1])
+
+                    yield from done()
+                    if not loading:
+                        if exhausted:
+                            return
+                        continue
+
+                    for handle in [*filter(self.__browser.load_expired, loading)]:
+                        self.__browser.stop(handle)
+                        doi, _ = loading.pop(handle)
+                        idle.append(handle)
+
+                        queue[queue.index(handle)] = self.__timed_out(
+                            doi, DeadlineExceeded("load", self.__budget.load))
+                    yield from done()
+
+                    if ordered:
+                        handle = queue[0] if queue and isinstance(
+                            queue[0], str) and self.__browser.is_loaded(
+                            queue[0]) else None
                     else:
-                        doc_error = f"Request error (Code {response.code})"
+                        handle = next(
+                            filter(self.__browser.is_loaded, loading), None)
 
-                doc = Document(**doc)
-                if doc_error:
-                    doc.error = doc_error
-                pbar.update(1)
+                    if not handle:
+                        time.sleep(0.25)
+                        continue
+
+                    queue.remove(handle)
+                    doi, _ = loading.pop(handle)
+                    pbar.set_description(f"Processing DOI ({doi})")
+                    try:
+                        with self.__watchdog.watch(extract_budget, "extract"):
+                            doc = self.__extract(doi, skip)
+                    except DeadlineExceeded as e:
+                        restart()
+                        yield self.__timed_out(doi, e)
+                        break
+
+                    if self.__watchdog.expired:  # Done as the browser was killed
+                        restart()
+                        yield doc
+                        break
 
-                yield doc
+                    idle.append(handle)
+
+                    yield doc
 
 
 class ScrapperManager:
+    """
+    Builds the corpus in `output_dir`
+    - Standalone: scrapes every pending DOI of `doi_list`
+    - Distributed (`queue` given): DOIs are leased from the shared queue in
+      batches of `batch_size`, documents are written to the worker's shard
+      and shards are merged into `corpus/` once the queue is drained
+    - Saved documents are indexed incrementally, near-duplicates (by content
+      and abstract) are listed in `duplicates.tsv` and, with
+      `exclude_duplicates`, only the first of each cluster is in the vocab
+    - Saved documents are added to the full-text index in `index/`
+    - The vocab is written to `vocab.tsv` and, memory-mappable, to `vocab/`
+    - With `dtm`, the content n-grams counted for the full-text index are
+      also kept per document in `content_index/`, the document-term matrix
+      of the vocab is built from them in `dtm/` (with TF-IDF weights if
+      `tfidf`)
+    - With `parse_references`, the structured references of each document
+      are saved in `references/{doc_id}.json`
+    - Documents saved with an error are listed in `errors.tsv`
+    - Documents are also written to `sinks` as they are scraped (e.g. to
+      stream them to another process), sinks are closed at the end
+    - `on_document` is called with each saved document. Once `cancel` is
+      set the scraping stops after the current document, the indexes are
+      saved and the next run resumes from there
+    - With `refresh`, only those fields of the saved documents (of
+      `doi_list`, or all) are read again and merged into them, pages not
+      modified since their last refresh are skipped (`validators.sqlite`)
+    - `scraper_options` are forwarded to the Scraper
+    """
+
     def __init__(self, doi_list: Iterable[str] = [],
-                 output_dir: List[str] = [".", "output"]) -> None:
-        self.__scraper = Scraper()
+                 output_dir: List[str] = [".", "output"],
+                 queue: JobQueue = None, worker_id: str = None,
+                 batch_size: int = 10, parse_references: bool = False,
+                 exclude_duplicates: bool = False, dtm: bool = False,
+                 tfidf: bool = False,
+                 on_document: Callable[[Document], None] = None,
+                 cancel: threading.Event = None, sinks: List[ISink] = [],
+                 refresh: List[str] = [], **scraper_options) -> None:
+        self.__queue = queue
+        self.__on_document = on_document or (lambda doc: None)
+        self.__cancel = cancel or threading.Event()
+        self.__worker_id = worker_id or default_worker_id()
+        self.__batch_size = batch_size
+
+        self.__scraper = Scraper(download_dir=Path(
+            ".", ".data", self.__worker_id) if queue else None,
+            **scraper_options)
 
         self.__doi_list = doi_list
 
@@ -164,14 +570,65 @@ class ScrapperManager:
         self.__output_dir = Path(*output_dir).resolve()
         self.__corpus_dir = self.__output_dir.joinpath("corpus")
         self.__corpus_dir.mkdir(parents=True, exist_ok=True)
+        self.__sinks = sinks
+        self.__shards_dir = self.__output_dir.joinpath("shards")
 
         self.__vocab_dict = {
             "path_or_buf": self.__output_dir.joinpath("vocab.tsv"),
             "encoding": "utf-8", "sep": "\t", "index": False, "header": False}
+        self.__vocab_path = self.__output_dir.joinpath("vocab")
+        self.__citations_path = self.__output_dir.joinpath("citations.tsv")
+        self.__errors_path = self.__output_dir.joinpath("errors.tsv")
+        # Present while documents were saved since the outputs were built
+        self.__stale_path = self.__output_dir.joinpath(".stale")
+
+        self.__dtm = dtm or tfidf
+        self.__tfidf = tfidf
+        self.__dtm_path = self.__output_dir.joinpath("dtm")
+
+        self.__parse_references = parse_references
+        self.__references_dir = self.__output_dir.joinpath("references")
+
+        self.__exclude_duplicates = exclude_duplicates
+        self.__duplicates_path = self.__output_dir.joinpath("duplicates.tsv")
+        self.__minhash_path = self.__output_dir.joinpath("minhash.npz")
+        self.__loaded_minhash: MinHashLSH = None  # See __minhash
+
+        self.__search_index = InvertedIndex(self.__output_dir.joinpath("index"))
+        self.__content_index = InvertedIndex(
+            self.__output_dir.joinpath("content_index"),
+            fields=["content"]) if self.__dtm else None
+
+        self.__validators_path = self.__output_dir.joinpath("validators.sqlite")
 
         self.corpus: Corpus = Corpus()
 
-        self.__build_corpus()
+        try:
+            if refresh:
+                self.__refresh(refresh)
+            elif self.__queue:
+                self.__build_distributed()
+            else:
+                self.__build_corpus()
+        finally:  # Also when there is nothing to scrape
+            self.__close_sinks()
+
+    @property
+    def stats(self) -> Dict:
+        return self.__scraper.stats
+
+    @property
+    def __minhash(self) -> MinHashLSH:
+        """Loaded once a document is indexed, a run with nothing new skips it"""
+        if self.__loaded_minhash is None:
+            self.__loaded_minhash = MinHashLSH()
+            if self.__minhash_path.is_file():
+                self.__loaded_minhash.load(self.__minhash_path)
+        return self.__loaded_minhash
+
+    def __save_minhash(self):
+        if self.__loaded_minhash is not None:
+            self.__loaded_minhash.save(self.__minhash_path)
 
     @property
     def documents(self) -> Generator[Document, None, None]:
@@ -186,8 +643,227 @@ class ScrapperManager:
 
     def __build_corpus(self):
         if self.__pending:
-            for doc in self.__scraper.get(self.__pending):
-                doc.save(self.__corpus_dir)
-
-            vocab: pd.DataFrame = extract_ngrams(self.corpus["content"])
-            vocab.to_csv(**self.__vocab_dict)
+            self.__stale_path.touch()
+            corpus = JSONDirectorySink(self.__corpus_dir)
+            try:
+                for doc in self.__scraper.get(self.__pending):
+                    self.__save(doc, corpus)
+                    self.__log_error(doc)
+                    self.__index(doc)
+
+                    self.__on_document(doc)
+                    if self.__cancel.is_set():
+                        break
+            finally:
+                self.__close_sinks(corpus)
+
+            if self.__cancel.is_set():
+                self.__close_indexes()
+                self.__save_minhash()
+                return
+
+        # Also when the previous run stopped after its last document
+        if self.__stale_path.is_file():
+            self.__build_outputs()
+
+    def __refresh(self, fields: List[str]):
+        dois = set(self.__doi_list)
+        ids = [
+            doc_id for doc_id, doi in self.corpus["doi"].items()
+            if not dois or doi in dois]
+        documents = (
+            Document.load(self.__corpus_dir.joinpath(f"{doc_id}.json"))
+            for doc_id in ids)
+
+        # Fields the outputs are built from
+        rebuild = bool({"title", "abstract", "content", "references"} & {*fields})
+        if rebuild:
+            self.__stale_path.touch()
+
+        corpus = JSONDirectorySink(self.__corpus_dir)
+        try:
+            for doc in self.__scraper.refresh(
+                    documents, fields, Validators(self.__validators_path),
+                    total=len(ids)):
+                self.__save(doc, corpus)
+                if rebuild:
+                    self.__index(doc)
+
+                self.__on_document(doc)
+                if self.__cancel.is_set():
+                    break
+        finally:
+            self.__close_sinks(corpus)
+
+        if rebuild and not self.__cancel.is_set():
+            self.__build_outputs()
+        else:
+            self.__close_indexes()
+            if rebuild:
+                self.__save_minhash()
+
+    def __save(self, doc: Document, sink: ISink):
+        """
+        Writes the document to `sink` (the corpus or the worker's shard,
+        unbuffered as outputs are built from it) and to the extra sinks
+        """
+        for i in [sink, *self.__sinks]:
+            i.write(doc)
+
+        if sink.error:  # Only the extra sinks may fail without stopping
+            raise sink.error
+
+    def __close_sinks(self, sink: ISink = None):
+        """
+        Closes `sink` and the extra sinks, once, even if closing one fails
+        - Only the failure of `sink` is raised, the extra sinks are logged
+        """
+        extra, self.__sinks = self.__sinks, []
+        try:
+            if sink:
+                sink.close()
+        finally:
+            for i in extra:
+                try:
+                    i.close()
+                except Exception:
+                    logger.exception("Could not close %s", type(i).__name__)
+
+    def __log_error(self, doc: Document):
+        if error := getattr(doc, "error", None):
+            with open(self.__errors_path, "a", encoding="utf-8") as f:
+                f.write(f"{doc.id}\t{doc.doi}\t{' '.join(f'{error}'.split())}\n")
+
+    def __index(self, doc: Document):
+        if text := " ".join(filter(None, [doc.abstract, doc.content])):
+            self.__minhash.add(doc.id, text)
+
+        self.__index_text(doc)
+
+    def __index_text(self, doc: Document):
+        """The content is tokenized once, for both indexes"""
+        if not self.__content_index:
+            self.__search_index.add(doc)
+            return
+
+        content = document_ngrams([doc.content])
+        self.__content_index.add(doc, content)
+
+        ngrams = Counter(document_ngrams([doc.title, doc.abstract]))
+        ngrams.update(content)
+        self.__search_index.add(doc, dict(ngrams))
+
+    def __close_indexes(self):
+        self.__search_index.close()
+        if self.__content_index:
+            self.__content_index.close()
+
+    def __build_outputs(self):
+        self.__close_indexes()
+        self.__minhash.save(self.__minhash_path)
+        duplicates = self.__build_duplicates()
+
+        self.__build_vocab(exclude=duplicates if self.__exclude_duplicates else [])
+        self.__build_citations()
+        self.__build_references()
+        self.__stale_path.unlink(missing_ok=True)
+
+    def __build_duplicates(self) -> List[str]:
+        """Writes the near-duplicate clusters, returns all but their first"""
+        clusters = self.__minhash.clusters()
+        pd.DataFrame([
+            (n, doc_id) for n, cluster in enumerate(clusters)
+            for doc_id in cluster
+        ]).to_csv(self.__duplicates_path, encoding="utf-8", sep="\t",
+                  index=False, header=False)
+
+        return [doc_id for cluster in clusters for doc_id in cluster[1:]]
+
+    def __build_vocab(self, exclude: List[str] = []):
+        content: pd.Series = self.corpus["content"]
+        if exclude:
+            content = content[~content.index.isin(exclude)]
+
+        vocab: pd.DataFrame = extract_ngrams(content)
+        vocab.to_csv(**self.__vocab_dict)
+        write_vocab(self.__vocab_path, vocab)
+
+        if self.__dtm:
+            # Documents scraped before --dtm was used are tokenized now
+            indexed = {i.decode("utf-8") for i in self.__content_index.read()[0]}
+            for doc_id, text in content.items():
+                if doc_id not in indexed:
+                    self.__content_index.add_ngrams(
+                        doc_id, document_ngrams([text]))
+            self.__content_index.close()
+
+            indptr, indices, data, doc_ids = extract_dtm(
+                vocab, content.index, self.__content_index)
+            write_dtm(self.__dtm_path, indptr, indices, data, doc_ids,
+                      len(vocab), weights=self.__tfidf)
+
+    def __build_citations(self):
+        graph = CitationGraph()
+        for doc in self.documents:
+            graph.add(doc)
+
+        graph.to_tsv(self.documents, self.__citations_path)
+
+    def __build_references(self):
+        if not self.__parse_references:
+            return
+
+        self.__references_dir.mkdir(parents=True, exist_ok=True)
+        for doc_id, references in parse_corpus(self.documents):
+            save_references(doc_id, references, self.__references_dir)
+
+    def __build_distributed(self):
+        shard_dir = self.__shards_dir.joinpath(self.__worker_id)
+        shard_dir.mkdir(parents=True, exist_ok=True)
+
+        self.__queue.seed(self.__pending)
+
+        shard = JSONDirectorySink(shard_dir)
+        try:
+            with self.__queue.keep_alive(self.__worker_id):
+                while not self.__queue.drained and not self.__cancel.is_set():
+                    batch = self.__queue.lease(self.__worker_id, self.__batch_size)
+                    if not batch:  # Other workers hold the remaining leases
+                        time.sleep(self.__queue.lease_time / 10)
+                        continue
+
+                    for doc in self.__scraper.get(batch):
+                        self.__save(doc, shard)
+                        self.__queue.complete(
+                            self.__worker_id, doc.doi, getattr(doc, "error", None))
+
+                        self.__on_document(doc)
+                        # The rest of the batch is leased again once it expires
+                        if self.__cancel.is_set():
+                            break
+        finally:
+            self.__close_sinks(shard)
+
+        if self.__cancel.is_set():
+            return
+
+        if self.__queue.acquire("merge", self.__worker_id):
+            try:
+                # Heartbeats renew the lock while the outputs are built
+                with self.__queue.keep_alive(self.__worker_id):
+                    if self.__merge_shards() or self.__stale_path.is_file():
+                        self.__build_outputs()
+            finally:
+                self.__queue.release("merge", self.__worker_id)
+
+    def __merge_shards(self) -> bool:
+        merged = False
+        for file in self.__shards_dir.glob("*/*.json"):
+            if not merged:
+                self.__stale_path.touch()
+            file = file.replace(self.__corpus_dir.joinpath(file.name))
+            doc = Document.load(file)
+            self.__log_error(doc)
+            self.__index(doc)
+            merged = True
+        return merged
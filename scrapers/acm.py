@@ -1,14 +1,14 @@
-import os
 import re
+from concurrent.futures import Future
 from datetime import datetime
+from pathlib import Path
 from typing import List
 
-import requests
-
 from scrapers import IScraperStrategy
 from common.utils.pdf import PDF
 from common.utils.text import fix_text_wraps, extract_name
 from webdriver import WebDriver
+from webdriver.utils import get_inner_text
 
 
 class ACMScraper(IScraperStrategy):
@@ -28,22 +28,24 @@ class ACMScraper(IScraperStrategy):
     @property
     def authors(self) -> List[str]:
         authors = [
-            extract_name(i.text)
-            for i in self.__webdriver.find_elements("span.loa__author-name")
+            extract_name(i)
+            for i in get_inner_text(
+                self.__webdriver.find_elements("span.loa__author-name"))
         ]
         return authors if any(authors) else None
 
     @property
-    def content(self) -> str:
-        self.__webdriver.click_element(".pdf-file a")
+    def content(self) -> Future:
+        link = self.__webdriver.find_element(".pdf-file a")
+        if not link:
+            return None
 
-        pdf_path = self.__webdriver.wait_for_download_queue()
+        return self.__webdriver.download(
+            link.get_attribute("href"), then=self.__transcribe)
 
+    @staticmethod
+    def __transcribe(pdf_path: Path) -> str:
         pdf = PDF(path=pdf_path, remove_css_selectors="div.annotation")
-
-        self.__webdriver.back()
-        os.remove(pdf_path)
-
         return fix_text_wraps(pdf.full_text)
 
     @property
@@ -79,7 +81,7 @@ class ACMScraper(IScraperStrategy):
 
         refs = self.__webdriver.find_elements(
             'li.references__item:not([id$="_copy"]) span.references__note')
-        return [ref.text for ref in refs]
+        return get_inner_text(refs)
 
 
 def get_strategy() -> IScraperStrategy:
@@ -6,6 +6,7 @@ from selenium.webdriver.common.by import By
 from scrapers import IScraperStrategy
 from common.utils.text import fix_text_wraps, extract_name
 from webdriver import WebDriver
+from webdriver.utils import get_inner_text
 
 
 class BMCScraper(IScraperStrategy):
@@ -25,9 +26,9 @@ class BMCScraper(IScraperStrategy):
     @property
     def authors(self) -> List[str]:
         authors = [
-            extract_name(i.text)
-            for i in self.__webdriver.find_elements(
-                "ul.c-article-author-list li.c-article-author-list__item")
+            extract_name(i)
+            for i in get_inner_text(self.__webdriver.find_elements(
+                "ul.c-article-author-list li.c-article-author-list__item"))
         ]
         return authors if any(authors) else None
 
@@ -36,20 +37,15 @@ class BMCScraper(IScraperStrategy):
         sections = {}
         for section in self.__webdriver.find_elements("article section"):
             title = section.get_attribute("data-title")
-            sections[f"{title}"] = " ".join([
-                i.text for i in section.find_elements(
-                    By.CSS_SELECTOR, "div.c-article-section :not(h2, h3, h4)")
-            ])
+            sections[f"{title}"] = " ".join(get_inner_text(section.find_elements(
+                By.CSS_SELECTOR, "div.c-article-section :not(h2, h3, h4)")))
         return fix_text_wraps(" ".join(sections.values())) if sections else None
 
     @property
     def abstract(self) -> str:
-        return "\n".join([
-            i.text
-            for i in self.__webdriver.find_element(
-                "#Abs1-content"
-            ).find_elements(By.TAG_NAME, "p")
-        ])
+        return "\n".join(get_inner_text(self.__webdriver.find_element(
+            "#Abs1-content"
+        ).find_elements(By.TAG_NAME, "p")))
 
     @property
     def citations(self) -> int:
@@ -68,9 +64,8 @@ class BMCScraper(IScraperStrategy):
 
     @property
     def references(self) -> List[str]:
-        return [
-            ref.text for ref in self.__webdriver.find_elements(
-                'p.c-article-references__text')]
+        return get_inner_text(self.__webdriver.find_elements(
+            'p.c-article-references__text'))
 
 
 def get_strategy() -> IScraperStrategy:
@@ -6,6 +6,7 @@ from selenium.webdriver.common.by import By
 from scrapers import IScraperStrategy
 from common.utils.text import fix_text_wraps, extract_name
 from webdriver import WebDriver
+from webdriver.utils import get_inner_text
 
 
 class ElsevierScraper(IScraperStrategy):
@@ -31,7 +32,7 @@ class ElsevierScraper(IScraperStrategy):
         authors = [
             author.find_elements(By.CSS_SELECTOR, "span.content span")
             for author in authors]
-        authors = [extract_name(" ".join([i.text for i in name_parts]))
+        authors = [extract_name(" ".join(get_inner_text(name_parts)))
                    for name_parts in authors]
         return authors if any(authors) else None
 
@@ -43,17 +44,14 @@ class ElsevierScraper(IScraperStrategy):
         for section in self.__webdriver.wait_for_elements("div#body section"):
             title = section.find_element(
                 By.CSS_SELECTOR, "h2, h3, h4").text.strip()
-            paragraphs = [
-                paragraph
-                for paragraph in section.find_elements(By.CSS_SELECTOR, "p")]
-            sections[f"{title}"] = " ".join([p.text for p in paragraphs])
+            paragraphs = section.find_elements(By.CSS_SELECTOR, "p")
+            sections[f"{title}"] = " ".join(get_inner_text(paragraphs))
         return fix_text_wraps(" ".join(sections.values())) if sections else None
 
     @property
     def abstract(self) -> str:
-        return "\n".join([
-            p.text for p in self.__webdriver.find_elements("div#abstracts p")
-        ])
+        return "\n".join(get_inner_text(
+            self.__webdriver.find_elements("div#abstracts p")))
 
     @property
     def citations(self) -> int:
@@ -74,9 +72,9 @@ class ElsevierScraper(IScraperStrategy):
     @property
     def references(self) -> List[str]:
         return [
-            fix_text_wraps(ref.text)
-            for ref in self.__webdriver.wait_for_elements(
-                "dl.references div.contribution")]
+            fix_text_wraps(ref)
+            for ref in get_inner_text(self.__webdriver.wait_for_elements(
+                "dl.references div.contribution"))]
 
 
 def get_strategy() -> IScraperStrategy:
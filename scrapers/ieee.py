@@ -1,16 +1,16 @@
-import os
 import re
+from concurrent.futures import Future
 from datetime import datetime
+from pathlib import Path
 from typing import List
-from urllib import response
 
-import requests
 from selenium.webdriver.common.by import By
 
 from scrapers import IScraperStrategy
 from common.utils.pdf import PDF
 from common.utils.text import extract_name, fix_text_wraps
 from webdriver import WebDriver
+from webdriver.utils import get_inner_text
 
 
 class IEEEScraper(IScraperStrategy):
@@ -40,12 +40,12 @@ class IEEEScraper(IScraperStrategy):
             self.__webdriver.click_element(id, ".authors-accordion-container")
 
         return [
-            extract_name(i.text.split("\n")[0])
-            for i in self.__webdriver.find_elements(
-                ".authors-accordion-container")]
+            extract_name(i.split("\n")[0])
+            for i in get_inner_text(self.__webdriver.find_elements(
+                ".authors-accordion-container"))]
 
     @property
-    def content(self) -> str:
+    def content(self) -> str | Future:
         sections = {}
 
         sections["abstract"] = self.abstract
@@ -53,24 +53,22 @@ class IEEEScraper(IScraperStrategy):
         if self.__is_content_html:
             for section in self.__webdriver.find_elements(".section"):
                 title = section.find_element(By.TAG_NAME, "h2").text.strip()
-                paragraphs = [
-                    paragraph.text.strip()
-                    for paragraph in section.find_elements(By.TAG_NAME, "p")]
+                paragraphs = get_inner_text(
+                    section.find_elements(By.TAG_NAME, "p"))
                 sections[f"{title.lower()}"] = "\n".join(paragraphs)
 
             return fix_text_wraps(" ".join(sections.values()))
-        else:
-            self.__webdriver.click_element(
-                "a.stats-document-lh-action-downloadPdf_2")
-
-            pdf_path = self.__webdriver.wait_for_download_queue()
-
-            pdf = PDF(path=pdf_path, remove_css_selectors="div.annotation")
+        elif link := self.__webdriver.find_element(
+                "a.stats-document-lh-action-downloadPdf_2"):
+            return self.__webdriver.download(
+                link.get_attribute("href"), then=self.__transcribe)
 
-            self.__webdriver.back()
-            os.remove(pdf_path)
+        return None
 
-            return fix_text_wraps(pdf.full_text)
+    @staticmethod
+    def __transcribe(pdf_path: Path) -> str:
+        pdf = PDF(path=pdf_path, remove_css_selectors="div.annotation")
+        return fix_text_wraps(pdf.full_text)
 
     @property
     def abstract(self) -> str:
@@ -115,9 +113,9 @@ class IEEEScraper(IScraperStrategy):
                 "#references-header", ".reference-container")
 
         refs = [
-            ref.text for ref in self.__webdriver.find_elements(
+            ref for ref in get_inner_text(self.__webdriver.find_elements(
                 ".reference-container"
-            ) if ref.text]
+            )) if ref]
 
         return [
             re.sub(
@@ -7,6 +7,7 @@ from selenium.webdriver.common.by import By
 from scrapers import IScraperStrategy
 from common.utils.text import fix_text_wraps, extract_name
 from webdriver import WebDriver
+from webdriver.utils import get_inner_text
 
 
 class SpringerScraper(IScraperStrategy):
@@ -36,20 +37,15 @@ class SpringerScraper(IScraperStrategy):
         sections = {}
         for section in self.__webdriver.find_elements("div.c-article-body section"):
             title = section.get_attribute("data-title")
-            sections[f"{title}"] = " ".join([
-                i.text for i in section.find_elements(
-                    By.CSS_SELECTOR, "div.c-article-section :not(h2, h3, h4)")
-            ]).strip()
+            sections[f"{title}"] = " ".join(get_inner_text(section.find_elements(
+                By.CSS_SELECTOR, "div.c-article-section :not(h2, h3, h4)"))).strip()
         return fix_text_wraps(" ".join(sections.values())) if sections else None
 
     @property
     def abstract(self) -> str:
-        return "\n".join([
-            i.text
-            for i in self.__webdriver.find_element(
-                "#Abs1-content"
-            ).find_elements(By.TAG_NAME, "p")
-        ])
+        return "\n".join(get_inner_text(self.__webdriver.find_element(
+            "#Abs1-content"
+        ).find_elements(By.TAG_NAME, "p")))
 
     @property
     def citations(self) -> int:
@@ -78,9 +74,8 @@ class SpringerScraper(IScraperStrategy):
 
     @property
     def references(self) -> List[str]:
-        return [
-            ref.text for ref in self.__webdriver.find_elements(
-                "li.c-article-references__item p.c-article-references__text")]
+        return get_inner_text(self.__webdriver.find_elements(
+            "li.c-article-references__item p.c-article-references__text"))
 
 
 def get_strategy() -> IScraperStrategy:
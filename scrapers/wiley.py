@@ -7,7 +7,7 @@ from selenium.webdriver.common.by import By
 from scrapers import IScraperStrategy
 from common.utils.text import fix_text_wraps, extract_name
 from webdriver import WebDriver
-from webdriver.utils import get_text_from_element
+from webdriver.utils import get_inner_text, get_text_from_elements
 
 
 class WileyScraper(IScraperStrategy):
@@ -41,19 +41,15 @@ class WileyScraper(IScraperStrategy):
                                              ":scope > section.article-section__content," +
                                              "section.article-section__sub-content"):
             title = section.find_element(By.CSS_SELECTOR, "h2, h3, h4").text
-            sections[f"{title}"] = " ".join([
-                i.text for i in section.find_elements(
-                    By.CSS_SELECTOR, ":not(h2, h3, h4)")
-            ]).strip()
+            sections[f"{title}"] = " ".join(get_inner_text(
+                section.find_elements(By.CSS_SELECTOR, ":not(h2, h3, h4)")
+            )).strip()
         return fix_text_wraps(" ".join(sections.values())) if sections else None
 
     @property
     def abstract(self) -> str:
-        return "\n".join([
-            i.text
-            for i in self.__webdriver.find_elements(
-                "section.article-section__abstract p")
-        ])
+        return "\n".join(get_inner_text(self.__webdriver.find_elements(
+            "section.article-section__abstract p")))
 
     @property
     def citations(self) -> int:
@@ -73,9 +69,9 @@ class WileyScraper(IScraperStrategy):
     @property
     def references(self) -> List[str]:
         return [
-            re.sub(r"(?P<ref>^.+\.).+$", r"\g<ref>", get_text_from_element(i))
-            for i in self.__webdriver.find_elements(
-                "section#references-section li[data-bib-id]")]
+            re.sub(r"(?P<ref>^.+\.).+$", r"\g<ref>", i)
+            for i in get_text_from_elements(self.__webdriver.find_elements(
+                "section#references-section li[data-bib-id]"))]
 
 
 def get_strategy() -> IScraperStrategy:
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+from common.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+FIELDS: List[str] = ["id", "doi", "url", "title", "authors", "content",
+                     "abstract", "citations", "source", "date", "references"]
+
+
+def as_record(doc: Document) -> Dict:
+    """Document fields (and error, if any) as a JSON-serializable dict"""
+    record = {field: getattr(doc, field, None) for field in FIELDS}
+    if hasattr(record["date"], "isoformat"):
+        record["date"] = record["date"].isoformat()
+    if error := getattr(doc, "error", None):
+        record["error"] = f"{error}"
+    return record
+
+
+class ISink(ABC):
+    """
+    Destination of the documents as they are scraped
+    - Documents are buffered and written in batches of `batch_size`
+    - With `flush_interval` (seconds), a partial batch is written once it
+      has waited that long, so consumers keep up when documents are slow
+    - A batch that cannot be written (e.g. the reader of a pipe is gone) is
+      logged and the sink disabled, its next documents are dropped and
+      `error` holds the exception, the scraping goes on
+    """
+
+    def __init__(self, batch_size: int = 1, flush_interval: float = None):
+        self.__batch_size = max(batch_size, 1)
+        self.__flush_interval = flush_interval
+        self.__buffer: List[Document] = []
+        self.__since = time.time()  # Oldest buffered document
+
+        self.__lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.error: Exception = None
+
+        self.__flusher: threading.Thread = None
+        if flush_interval:
+            self.__flusher = threading.Thread(
+                target=self.__flush_periodically, daemon=True)
+            self.__flusher.start()
+
+    @abstractmethod
+    def write_batch(self, docs: List[Document]) -> None:
+        pass
+
+    def close(self) -> None:
+        self.__closed.set()
+        if self.__flusher and self.__flusher is not threading.current_thread():
+            self.__flusher.join()
+        self.flush()
+
+    def write(self, doc: Document) -> None:
+        with self.__lock:
+            if self.error:
+                return
+            if not self.__buffer:
+                self.__since = time.time()
+            self.__buffer.append(doc)
+
+            if len(self.__buffer) >= self.__batch_size:
+                self.__flush()
+
+    def flush(self) -> None:
+        with self.__lock:
+            self.__flush()
+
+    def __flush(self) -> None:
+        if not self.__buffer:
+            return
+        try:
+            self.write_batch(self.__buffer)
+        except Exception as e:
+            self.error = e
+            logger.exception(
+                "%s disabled, %d documents not written",
+                type(self).__name__, len(self.__buffer))
+        self.__buffer = []
+
+    def __flush_periodically(self) -> None:
+        while not self.__closed.wait(self.__flush_interval / 4):
+            with self.__lock:
+                if time.time() - self.__since >= self.__flush_interval:
+                    self.__flush()
+
+    def __enter__(self) -> "ISink":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,19 @@
+from pathlib import Path
+from typing import List
+
+from common.models.document import Document
+from sinks import ISink
+
+
+class JSONDirectorySink(ISink):
+    """One `{doc_id}.json` file per document, the corpus layout"""
+
+    def __init__(self, directory: Path, batch_size: int = 1,
+                 flush_interval: float = None):
+        self.__directory = Path(directory)
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        super().__init__(batch_size, flush_interval)
+
+    def write_batch(self, docs: List[Document]) -> None:
+        for doc in docs:
+            doc.save(self.__directory)
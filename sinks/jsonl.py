@@ -0,0 +1,33 @@
+import json
+import sys
+from pathlib import Path
+from typing import List
+
+from common.models.document import Document
+from sinks import ISink, as_record
+
+
+class JSONLSink(ISink):
+    """
+    One JSON document per line, appended to `path`, which may be a named
+    pipe, or written to stdout if `path` is "-"
+    - Each batch is written and flushed at once, so readers never see
+      partial lines
+    """
+
+    def __init__(self, path: Path | str = "-", batch_size: int = 1,
+                 flush_interval: float = None):
+        self.__file = sys.stdout if f"{path}" == "-" else open(
+            path, "a", encoding="utf-8")
+        super().__init__(batch_size, flush_interval)
+
+    def write_batch(self, docs: List[Document]) -> None:
+        self.__file.write("".join(
+            f"{json.dumps(as_record(doc), ensure_ascii=False, default=str)}\n"
+            for doc in docs))
+        self.__file.flush()
+
+    def close(self) -> None:
+        super().close()
+        if self.__file is not sys.stdout:
+            self.__file.close()
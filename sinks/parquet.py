@@ -0,0 +1,18 @@
+from pathlib import Path
+from typing import List
+
+from common.models.document import Document
+from sinks import ISink
+from utils.parquet import ParquetStore
+
+
+class ParquetSink(ISink):
+    """Appends each batch as a new part of a ParquetStore"""
+
+    def __init__(self, directory: Path, batch_size: int = 1000,
+                 flush_interval: float = 60):
+        self.__store = ParquetStore(directory)
+        super().__init__(batch_size, flush_interval)
+
+    def write_batch(self, docs: List[Document]) -> None:
+        self.__store.append(docs)
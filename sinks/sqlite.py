@@ -0,0 +1,45 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import List
+
+from common.models.document import Document
+from sinks import ISink, as_record
+
+
+class SQLiteSink(ISink):
+    """
+    Documents upserted in the `documents` table of a SQLite database
+    - Each batch is a single transaction, so larger batches mean fewer
+      commits (and fsyncs)
+    - WAL journaling lets readers query the table while it is written
+    """
+
+    def __init__(self, path: Path, batch_size: int = 100,
+                 flush_interval: float = 5):
+        self.__conn = sqlite3.connect(f"{path}", check_same_thread=False)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                doi TEXT,
+                error TEXT,
+                saved_at REAL,
+                data TEXT
+            )""")
+        self.__conn.commit()
+        super().__init__(batch_size, flush_interval)
+
+    def write_batch(self, docs: List[Document]) -> None:
+        now = time.time()
+        with self.__conn:
+            self.__conn.executemany(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)", [
+                    (record["id"], record["doi"], record.get("error"), now,
+                     json.dumps(record, ensure_ascii=False, default=str))
+                    for record in map(as_record, docs)])
+
+    def close(self) -> None:
+        super().close()
+        self.__conn.close()
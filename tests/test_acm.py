@@ -0,0 +1,158 @@
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable
+from urllib.parse import parse_qs
+
+import pytest
+
+pytest.importorskip("common.utils.text")  # Submodule, see .gitmodules
+
+from metadata import IMetadataSource, fetch_all, fields_from_csl  # noqa: E402
+from metadata.acm import ACMExport  # noqa: E402
+
+RECORDS = {
+    f"10.1145/{i}": {
+        "id": f"10.1145/{i}",
+        "type": "paper-conference",
+        "title": f"Paper {i}",
+        "author": [{"family": "Doe", "given": "Jane"},
+                   {"literal": "John Smith"}],
+        "abstract": "<p>An <b>abstract</b></p>",
+        "container-title": "Proceedings",
+        "issued": {"date-parts": [[2021, 6]]},
+        "DOI": f"10.1145/{i}"}
+    for i in range(5)}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """exportCiteProcCitation stand-in, answers with the canned RECORDS"""
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(
+            int(self.headers["Content-Length"])).decode("utf-8"))
+        dois = form["dois"][0].split(",")
+        self.server.batches.append(dois)
+
+        if self.path == "/error":
+            self.send_response(500)
+            body = b"Internal Server Error"
+        else:
+            self.send_response(200)
+            body = b"<html>Not JSON</html>" if self.path == "/html" else \
+                json.dumps(dict(items=[
+                    {doi.upper(): RECORDS[doi]}  # DOIs are case insensitive
+                    for doi in dois if doi in RECORDS])).encode("utf-8")
+
+        self.send_header("Content-Length", f"{len(body)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.batches = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class Canned(IMetadataSource):
+    def __init__(self, records: Dict[str, Dict]):
+        self.records = records
+        self.requested = []
+
+    def supports(self, doi: str) -> bool:
+        return True
+
+    def fetch(self, doi_list: Iterable[str]) -> Dict[str, Dict]:
+        self.requested.extend(doi_list)
+        return {doi: self.records[doi]
+                for doi in doi_list if doi in self.records}
+
+
+def test_fields_from_csl():
+    fields = fields_from_csl(RECORDS["10.1145/0"])
+
+    assert fields["title"] == "Paper 0"
+    assert len(fields["authors"]) == 2
+    assert " ".join(fields["abstract"].split()) == "An abstract"
+    assert fields["source"] == "Proceedings"
+    assert fields["date"] == datetime(2021, 6, 1)
+    assert "citations" not in fields and "references" not in fields
+
+
+def test_fields_from_crossref_record():
+    fields = fields_from_csl({
+        "title": [], "container-title": ["Journal"],
+        "is-referenced-by-count": 3,
+        "published-print": {"date-parts": [[None]]},
+        "created": {"date-parts": [[2020, 1, 2]]},
+        "reference": [{"unstructured": "A reference"},
+                      {"author": "Doe", "year": "2019", "DOI": "10.1/x"}]})
+
+    assert "title" not in fields
+    assert fields["source"] == "Journal"
+    assert fields["citations"] == 3
+    assert fields["date"] == datetime(2020, 1, 2)
+    assert fields["references"] == ["A reference", "Doe. 2019. doi:10.1/x"]
+
+
+def test_fetch_in_batches(endpoint):
+    server, url = endpoint
+    acm = ACMExport(endpoint=url, batch_size=2)
+    dois = [*RECORDS, "10.1145/unknown"]
+
+    found = acm.fetch(dois)
+
+    assert server.batches == [dois[0:2], dois[2:4], dois[4:6]]
+    assert set(found) == set(RECORDS)
+    assert found["10.1145/3"] == fields_from_csl(RECORDS["10.1145/3"])
+
+
+def test_fetch_all_skips_unsupported_and_found(endpoint):
+    server, url = endpoint
+    fallback = Canned({"10.1145/unknown": {"title": "Found elsewhere"},
+                       "10.1109/1": {"title": "IEEE"}})
+    dois = ["10.1145/0", "10.1145/unknown", "10.1109/1"]
+
+    found = fetch_all([ACMExport(endpoint=url), fallback], dois)
+
+    assert server.batches == [["10.1145/0", "10.1145/unknown"]]
+    assert fallback.requested == ["10.1145/unknown", "10.1109/1"]
+    assert found == {
+        "10.1145/0": fields_from_csl(RECORDS["10.1145/0"]),
+        "10.1145/unknown": {"title": "Found elsewhere"},
+        "10.1109/1": {"title": "IEEE"}}
+
+
+@pytest.mark.parametrize("path", ["/error", "/html"])
+def test_failed_batches_are_skipped(endpoint, path):
+    server, url = endpoint
+    acm = ACMExport(endpoint=f"{url}{path}", batch_size=2)
+
+    assert acm.fetch([*RECORDS]) == {}
+    assert len(server.batches) == 3  # Each batch still tried
+
+
+def test_unreachable_endpoint(endpoint):
+    server, url = endpoint
+    server.shutdown()
+    server.server_close()
+
+    acm = ACMExport(endpoint=url, timeout=2)
+    assert acm.fetch(["10.1145/0"]) == {}
+
+
+def test_supports():
+    acm = ACMExport()
+    assert acm.supports("10.1145/3411764.3445372")
+    assert acm.supports("10.1145/ABC")
+    assert not acm.supports("10.1109/5.771073")
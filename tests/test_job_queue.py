@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import job_queue
+from utils.job_queue import JobQueue
+
+LEASE = 300
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Time seen by the queue, moved forward by the tests"""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(job_queue, "time",
+                        SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return JobQueue(tmp_path.joinpath("queue.sqlite"), lease=LEASE,
+                    max_attempts=2)
+
+
+def test_lease_and_complete(queue):
+    queue.seed(["10.1/a", " 10.1/b", "10.1/c"])
+
+    assert sorted(queue.lease("w1", 2)) == ["10.1/a", "10.1/b"]
+    assert queue.lease("w2", 5) == ["10.1/c"]
+    assert queue.lease("w2", 5) == []
+
+    queue.complete("w1", "10.1/a")
+    queue.complete("w1", "10.1/b", error="Request error")
+    queue.complete("w2", "10.1/c")
+
+    assert queue.counts() == dict(pending=0, leased=0, done=2, failed=1)
+    assert queue.drained
+
+
+def test_expired_lease_returns_to_the_queue(queue, clock):
+    queue.seed(["10.1/a"])
+    queue.lease("w1")
+
+    clock.value += LEASE - 1
+    assert queue.lease("w2") == []
+
+    clock.value += 2
+    assert queue.lease("w2") == ["10.1/a"]
+    assert queue.counts()["leased"] == 1
+
+
+def test_expired_lease_fails_after_max_attempts(queue, clock):
+    queue.seed(["10.1/a"])
+    for worker in ["w1", "w2"]:
+        assert queue.lease(worker) == ["10.1/a"]
+        clock.value += LEASE + 1
+
+    assert queue.counts() == dict(pending=0, leased=0, done=0, failed=1)
+    assert queue.lease("w3") == []
+
+
+def test_heartbeat_renews_leases(queue, clock):
+    queue.seed(["10.1/a"])
+    queue.lease("w1")
+
+    clock.value += LEASE - 1
+    queue.heartbeat("w1")
+    clock.value += LEASE - 1
+
+    assert queue.lease("w2") == []
+    assert queue.counts()["leased"] == 1
+
+
+def test_workers(queue, clock):
+    queue.seed(["10.1/a", "10.1/b"])
+    queue.lease("w1", 2)
+    queue.heartbeat("w2")
+
+    assert queue.workers() == {"w1": 2, "w2": 0}
+
+    clock.value += LEASE - 1
+    queue.heartbeat("w2")
+    clock.value += 2
+
+    assert queue.workers() == {"w2": 0}
+
+
+def test_lock_is_exclusive_until_released(queue):
+    assert queue.acquire("merge", "w1")
+    assert not queue.acquire("merge", "w2")
+
+    queue.release("merge", "w2")  # Not its lock
+    assert not queue.acquire("merge", "w2")
+
+    queue.release("merge", "w1")
+    assert queue.acquire("merge", "w2")
+
+
+def test_lock_expires_unless_renewed(queue, clock):
+    assert queue.acquire("merge", "w1")
+
+    clock.value += LEASE - 1
+    queue.heartbeat("w1")
+    clock.value += LEASE - 1
+    assert not queue.acquire("merge", "w2")
+
+    clock.value += 2
+    assert queue.acquire("merge", "w2")
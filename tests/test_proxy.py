@@ -0,0 +1,137 @@
+import importlib.util
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# webdriver/__init__ needs selenium, the pool only needs requests
+spec = importlib.util.spec_from_file_location(
+    "proxy", Path(__file__).parents[1].joinpath("webdriver", "proxy.py"))
+proxy = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(proxy)
+
+PROBE_URL = "http://probe.invalid/"
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Forward proxy stand-in, answers every request with `server.status`"""
+
+    def do_HEAD(self):
+        self.server.hits.append(self.path)
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_HEAD
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(status: int = 200) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+        server.status, server.hits = status, []
+        server.url = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def dead_proxy() -> str:
+    with socket.socket() as sock:  # Port freed right away, nothing listens
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_score_decays_with_errors(stand_in):
+    pool = proxy.ProxyPool([stand_in().url], alpha=0.5, min_requests=10)
+    p = pool.acquire()
+
+    pool.report(p, 0.5, 200)
+    healthy_score = p.score
+    assert p.error_rate == 0.0 and p.latency == 0.5
+
+    pool.report(p, 0.5, 500)
+    assert p.error_rate == 0.5
+    pool.report(p, 0.5, None)  # Connection error
+    assert p.error_rate == 0.75
+    assert p.score < healthy_score
+    assert p.requests == 3 and p.errors == 2 and p.healthy
+
+    pool.report(p, 0.5, 200)
+    assert p.error_rate == 0.375
+
+
+def test_failing_proxy_is_evicted(stand_in):
+    pool = proxy.ProxyPool([stand_in().url], min_requests=3,
+                           max_error_rate=0.5, alpha=0.5)
+    p = pool.acquire()
+
+    for _ in range(2):  # Below min_requests, not evicted yet
+        pool.report(p, 0.1, 500)
+    assert p.healthy
+    pool.report(p, 0.1, 500)
+    assert not p.healthy and p.evictions == 1
+    assert p.error_rate == 0.0 and p.latency is None  # Fresh start
+
+
+def test_throttled_proxy_fails_over(stand_in):
+    good, throttled = stand_in(), stand_in()
+    pool = proxy.ProxyPool([good.url, throttled.url], cooldown=60)
+    by_url = {p["url"]: p for p in pool.stats()}
+    assert set(by_url) == {good.url, throttled.url}
+
+    while (p := pool.acquire()).url != throttled.url:
+        pass
+    pool.report(p, 0.1, 429)
+    assert p.throttles == 1 and not p.healthy
+
+    assert {pool.acquire().url for _ in range(50)} == {good.url}
+
+
+def test_evicted_proxy_is_probed_before_coming_back(stand_in):
+    recovered = stand_in()
+    pool = proxy.ProxyPool([recovered.url], cooldown=0, probe_url=PROBE_URL)
+    p = pool.acquire()
+    pool.report(p, 0.1, 503)
+    assert p.evictions == 1 and not recovered.hits
+
+    assert pool.acquire() is p  # Cooldown over, passes the probe
+    assert recovered.hits == [PROBE_URL]
+    assert p.evictions == 0
+
+
+def test_proxy_failing_the_probe_is_evicted_again(stand_in):
+    good, dead = stand_in(), dead_proxy()
+    pool = proxy.ProxyPool([good.url, dead], cooldown=0, probe_url=PROBE_URL,
+                           probe_timeout=2)
+    p = next(p for p in (pool.acquire() for _ in range(100)) if p.url == dead)
+    pool.report(p, 0.1, 503)
+
+    assert pool.acquire().url == good.url
+    assert p.evictions == 2  # Evicted, then failed the probe
+
+
+def test_every_proxy_evicted_uses_the_next_to_recover(stand_in):
+    first, second = stand_in(), stand_in()
+    pool = proxy.ProxyPool([first.url, second.url], cooldown=60)
+    a, b = sorted(
+        {p.url: p for p in (pool.acquire() for _ in range(100))}.values(),
+        key=lambda p: p.url != first.url)
+
+    pool.report(b, 0.1, 429)
+    pool.report(b, 0.1, 429)  # Cooldown doubled
+    pool.report(a, 0.1, 429)
+
+    assert pool.acquire() is a
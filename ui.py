@@ -1,16 +1,92 @@
+import csv
+import queue
+import shutil
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk
-from tkinter.messagebox import showinfo
-from typing import Tuple
+from collections import defaultdict
+from pathlib import Path
+from tkinter import filedialog, ttk
+from tkinter.messagebox import askyesno, showerror, showinfo
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+from utils.doi import doi_list_from_tabular, doi_list_from_txt, doi_to_md5
+
+OUTPUT_DIR = Path(".", "output")
+
+
+class VirtualListbox(ttk.Frame):
+    """
+    Listbox of a possibly huge list of items
+    - Only the visible rows are inserted in the Tk widget, scrolling moves
+      the window over the list
+    """
+
+    def __init__(self, master: tk.Misc, rows: int = 10,
+                 label: Callable[[str], str] = str):
+        super().__init__(master)
+        self.__items: List[str] = []
+        self.__offset = 0
+        self.__rows = rows
+        self.__label = label
+
+        self.__listbox = tk.Listbox(self, height=rows, activestyle=tk.NONE)
+        self.__listbox.grid(row=0, column=0, sticky="we")
+        self.__scrollbar = ttk.Scrollbar(
+            self, orient=tk.VERTICAL, command=self.__scroll)
+        self.__scrollbar.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+
+        for event in ["<MouseWheel>", "<Button-4>", "<Button-5>"]:
+            self.__listbox.bind(event, self.__wheel)
+
+    def set(self, items: List[str]) -> None:
+        self.__items = items
+        self.__offset = 0
+        self.refresh()
+
+    def refresh(self) -> None:
+        visible = self.__items[self.__offset:self.__offset + self.__rows]
+        self.__listbox.delete(0, tk.END)
+        if visible:
+            self.__listbox.insert(tk.END, *map(self.__label, visible))
+
+        n = max(len(self.__items), 1)
+        self.__scrollbar.set(
+            self.__offset / n, min((self.__offset + self.__rows) / n, 1))
+
+    def __scroll_to(self, offset: int) -> None:
+        self.__offset = max(min(offset, len(self.__items) - self.__rows), 0)
+        self.refresh()
+
+    def __scroll(self, action: str, value: str, unit: str = None) -> None:
+        if action == tk.MOVETO:
+            self.__scroll_to(int(float(value) * len(self.__items)))
+        else:  # SCROLL
+            step = self.__rows if unit == tk.PAGES else 1
+            self.__scroll_to(self.__offset + int(value) * step)
+
+    def __wheel(self, event: tk.Event) -> str:
+        up = event.num == 4 or event.delta > 0
+        self.__scroll_to(self.__offset + (-3 if up else 3))
+        return "break"
 
 
 class UI(ttk.Frame):
+    """
+    Scrapes the DOI list of a file in a background thread
+    - The worker only talks to the window through a queue, which the Tk
+      main loop polls, so the window never blocks
+    - Cancelling stops after the current document, the next run resumes
+    """
     __title: str = "ScraPapers"
     __file_types: Tuple[str] = (
         ('text files', '*.txt'),
-        ('Tabular files', '*.tsv, *.csv'))
+        ('Tabular files', '*.tsv *.csv'))
+    __poll_interval: int = 250  # ms
 
-    def __init__(self, window: tk.Tk, width: int = 265, height: int = 350):
+    def __init__(self, window: tk.Tk, width: int = 420, height: int = 600):
         self.__window = window
         self.__geometry = dict(width=width, height=height)
 
@@ -18,18 +94,31 @@ class UI(ttk.Frame):
         self.__window.resizable(False, False)
         self.__window.geometry(
             f"{self.__geometry['width']}x{self.__geometry['height']}")
+        self.__window.protocol("WM_DELETE_WINDOW", self.__close)
 
         # self.__window.iconbitmap("icon.ico")
 
+        self.__path: Path = None
+        self.__dois: List[str] = []
+        self.__status: Dict[str, bool] = {}  # DOI -> scraped without error
+
+        self.__events: queue.Queue = queue.Queue()  # (event, payload)
+        self.__cancel = threading.Event()
+        self.__worker: threading.Thread = None
+        self.__closing = False
+
         self.__initUI()
+        self.__poll()
 
     def __initUI(self) -> None:
+        self.__window.columnconfigure(0, weight=1)
+
         # File selection
         # Label
         self.__file_label_var = tk.StringVar()
         self.__file_label = ttk.Label(
-            self.__window, textvariable=self.__file_label_var)
-        self.__file_label.grid(column=0, row=0, padx=10, pady=10, ipadx=20)
+            self.__window, textvariable=self.__file_label_var, width=30)
+        self.__file_label.grid(column=0, row=0, padx=10, pady=10, sticky="w")
         self.__set_file_label(None)
 
         # Button
@@ -40,51 +129,241 @@ class UI(ttk.Frame):
         # Select field in tabular file
         self.__field_var = tk.StringVar()
         self.__field = ttk.Combobox(
-            self.__window, textvariable=self.__field_var,
-            values=[f"text {i}" for i in range(100)],
-            state=tk.DISABLED)
+            self.__window, textvariable=self.__field_var, state=tk.DISABLED)
+        self.__field.bind("<<ComboboxSelected>>", self.__field_selected)
         self.__field.grid(columnspan=2, row=1, padx=10, pady=10, sticky='we')
 
         # DOI number list
-        self.__doi_list = tk.Listbox(self.__window)
-
-        # Adding Listbox to the left
-        # side of root window
+        self.__doi_list = VirtualListbox(
+            self.__window, rows=10, label=self.__doi_label)
         self.__doi_list.grid(row=2, columnspan=2, padx=10,
                              pady=10, sticky='we')
 
-        # Insert elements into the listbox
-        for values in range(100):
-            self.__doi_list.insert(tk.END, values)
-
         # Override
-        self.__override_var = tk.StringVar()
+        self.__override_var = tk.BooleanVar()
         self.__override = ttk.Checkbutton(
-            self.__window, text='Override', variable=self.__override_var, onvalue=True, offvalue=False)
-        self.__override.grid(row=3, column=1, padx=10, pady=10, sticky="w")
+            self.__window, text='Override', variable=self.__override_var,
+            onvalue=True, offvalue=False)
+        self.__override.grid(row=3, column=0, padx=10, pady=10, sticky="w")
         self.__scrape = ttk.Button(
-            self.__window, text='Scrape', command=self.__start_scrape)
+            self.__window, text='Scrape', command=self.__start_scrape,
+            state=tk.DISABLED)
         self.__scrape.grid(column=1, row=3, padx=10, pady=10, sticky="e")
 
+        # Progress
+        self.__progress = ttk.Progressbar(self.__window, mode="determinate")
+        self.__progress.grid(row=4, columnspan=2, padx=10, sticky="we")
+        self.__progress_var = tk.StringVar()
+        ttk.Label(self.__window, textvariable=self.__progress_var).grid(
+            row=5, columnspan=2, padx=10, pady=5, sticky="w")
+
+        # Success and failure per domain
+        self.__domains = ttk.Treeview(
+            self.__window, columns=["done", "failed"], height=6)
+        self.__domains.heading("#0", text="Domain")
+        self.__domains.heading("done", text="Done")
+        self.__domains.heading("failed", text="Failed")
+        self.__domains.column("#0", width=240)
+        self.__domains.column("done", width=60, anchor=tk.E)
+        self.__domains.column("failed", width=60, anchor=tk.E)
+        self.__domains.grid(row=6, columnspan=2, padx=10, pady=10, sticky='we')
+
     def __open_file_dialog(self) -> None:
-        filename = tk.filedialog.askopenfilenames(
+        filename = filedialog.askopenfilename(
             title='Open file',
-            initialdir='/',
+            initialdir='.',
             filetypes=self.__file_types)
 
         self.__set_file_label(filename)
+        if not filename:
+            return
+
+        self.__path = Path(filename)
+        self.__field_var.set("")
+        self.__doi_list.set([])
+
+        if self.__path.suffix.lower() in [".csv", ".tsv"]:
+            with open(self.__path, "r", encoding="utf-8") as f:
+                header = next(csv.reader(f, delimiter=self.__separator), [])
+            self.__field.configure(values=header, state="readonly")
+        else:  # TXT
+            self.__field.configure(values=[], state=tk.DISABLED)
+            self.__load_doi_list()
+
+    @property
+    def __separator(self) -> str:
+        return "\t" if self.__path.suffix.lower() == ".tsv" else ","
 
     def __set_file_label(self, filename: str):
         if not filename:
             filename = "No file selected"
 
-        self.__file_label_var.set(filename)
+        self.__file_label_var.set(Path(filename).name)
+
+    def __field_selected(self, event: tk.Event = None) -> None:
+        if self.__field_var.get():
+            self.__load_doi_list()
+
+    def __load_doi_list(self) -> None:
+        """Reads the DOI list in background, large files would block"""
+        self.__scrape.configure(state=tk.DISABLED)
+        self.__progress_var.set("Loading DOI list...")
+
+        def load(path: Path, column: str) -> None:
+            try:
+                if column:
+                    dois = doi_list_from_tabular(path, self.__separator, column)
+                else:
+                    dois = doi_list_from_txt(path)
+                self.__events.put(("loaded", dois))
+            except Exception as e:
+                self.__events.put(("load_error", f"{e}"))
+
+        threading.Thread(
+            target=load, args=(self.__path, self.__field_var.get()),
+            daemon=True).start()
 
-    def __field_selected(self) -> None:
-        pass
+    def __doi_label(self, doi: str) -> str:
+        mark = {True: "✓", False: "✗"}.get(self.__status.get(doi), " ")
+        return f"{mark} {doi}"
 
     def __start_scrape(self) -> None:
-        pass
+        if self.__worker and self.__worker.is_alive():  # Cancel
+            self.__cancel.set()
+            self.__scrape.configure(state=tk.DISABLED)
+            self.__progress_var.set("Cancelling after the current document...")
+            return
+
+        if self.__override_var.get():
+            if not askyesno(self.__title, "You're about to erase all content "
+                            "from output. Proceed?"):
+                return
+            shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
+
+        # Documents are saved as {md5(doi)}.json, only the rest is scraped
+        saved = {file.stem for file in OUTPUT_DIR.joinpath("corpus").glob("*.json")}
+        self.__pending = sum(doi_to_md5(doi) not in saved for doi in self.__dois)
+        self.__done, self.__failed = 0, 0
+        self.__per_domain: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        self.__domains.delete(*self.__domains.get_children())
+        self.__started = time.time()
+
+        self.__progress.configure(maximum=max(self.__pending, 1), value=0)
+        self.__progress_var.set(f"Starting ({self.__pending} pending)...")
+        self.__scrape.configure(text="Cancel")
+        for widget in [self.__file_picker, self.__field, self.__override]:
+            widget.configure(state=tk.DISABLED)
+
+        self.__cancel.clear()
+        self.__worker = threading.Thread(
+            target=self.__run, args=(self.__dois,), daemon=True)
+        self.__worker.start()
+
+    def __run(self, doi_list: List[str]) -> None:
+        """Worker thread, must not touch the widgets"""
+        from scrapers import ScrapperManager
+
+        def on_document(doc) -> None:
+            domain = urlparse(getattr(doc, "url", None) or "").netloc
+            self.__events.put((
+                "document", (doc.doi, domain or "unresolved",
+                             not getattr(doc, "error", None))))
+
+        try:
+            ScrapperManager(doi_list, on_document=on_document,
+                            cancel=self.__cancel)
+            self.__events.put(("finished", None))
+        except Exception as e:
+            self.__events.put(("error", f"{e}"))
+
+    def __poll(self) -> None:
+        changed = False
+        while True:
+            try:
+                event, payload = self.__events.get_nowait()
+            except queue.Empty:
+                break
+
+            if event == "document":
+                self.__document(*payload)
+                changed = True
+            elif event == "loaded":
+                self.__dois = payload
+                self.__status.clear()
+                self.__doi_list.set(self.__dois)
+                self.__progress_var.set(f"{len(self.__dois)} DOIs")
+                self.__scrape.configure(
+                    state=tk.NORMAL if self.__dois else tk.DISABLED)
+            elif event == "load_error":  # The previous list is dropped too
+                self.__dois = []
+                self.__status.clear()
+                self.__doi_list.set(self.__dois)
+                self.__progress_var.set("Could not load the DOI list")
+                self.__scrape.configure(state=tk.DISABLED)
+                showerror(self.__title, payload)
+            elif event == "finished":
+                self.__finished("Cancelled" if self.__cancel.is_set()
+                                else "Finished")
+            elif event == "error":
+                self.__finished("Error")
+                showerror(self.__title, payload)
+
+        if changed:
+            self.__update_progress()
+            self.__doi_list.refresh()
+
+        if self.__closing and not (self.__worker and self.__worker.is_alive()):
+            self.__window.destroy()
+            return
+        self.__window.after(self.__poll_interval, self.__poll)
+
+    def __document(self, doi: str, domain: str, success: bool) -> None:
+        self.__status[doi] = success
+        if success:
+            self.__done += 1
+        else:
+            self.__failed += 1
+
+        counts = self.__per_domain[domain]
+        counts[0 if success else 1] += 1
+        if self.__domains.exists(domain):
+            self.__domains.item(domain, values=counts)
+        else:
+            self.__domains.insert("", tk.END, iid=domain, text=domain,
+                                  values=counts)
+
+    def __update_progress(self) -> None:
+        processed = self.__done + self.__failed
+        elapsed = time.time() - self.__started
+        rate = processed / elapsed if elapsed else 0  # Documents per second
+        eta = (self.__pending - processed) / rate if rate else 0
+
+        self.__progress.configure(value=processed)
+        self.__progress_var.set(
+            f"{processed}/{self.__pending} ({self.__failed} failed), "
+            f"{60 * rate:.1f} docs/min, "
+            f"ETA {time.strftime('%H:%M:%S', time.gmtime(eta))}")
+
+    def __finished(self, status: str) -> None:
+        self.__scrape.configure(
+            text="Scrape", state=tk.NORMAL if self.__dois else tk.DISABLED)
+        self.__file_picker.configure(state=tk.NORMAL)
+        self.__override.configure(state=tk.NORMAL)
+        if self.__field.cget("values"):
+            self.__field.configure(state="readonly")
+
+        if self.__worker:
+            self.__progress_var.set(
+                f"{status}: {self.__done} done, {self.__failed} failed")
+        if status == "Finished" and not self.__closing:
+            showinfo(self.__title, f"Scraping finished ({self.__done} done, "
+                     f"{self.__failed} failed)")
+
+    def __close(self) -> None:
+        """Lets the running job stop cleanly (closing the browser) first"""
+        self.__closing = True
+        self.__cancel.set()
+        self.__progress_var.set("Closing after the current document...")
 
 
 def main() -> None:
@@ -0,0 +1,97 @@
+import csv
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Tuple
+
+from common.models.document import Document
+from utils.doi import extract_doi
+
+WORD = re.compile(r"\w+")
+
+
+def normalize_doi(doi: str) -> str:
+    return doi.lower().rstrip(".,;)]")
+
+
+class CitationGraph:
+    """
+    Links reference strings to the corpus documents they cite
+    - A DOI found in the reference is matched against the corpus' DOIs
+    - Otherwise the reference's word n-grams are looked up in an inverted
+      index of the corpus titles, the title with the largest share of its
+      n-grams contained in the reference wins if above `threshold`
+    - N-grams shared by more than `max_postings` titles are ignored, so each
+      lookup costs O(reference length), independent of the corpus size
+    """
+
+    def __init__(self, n: int = 3, threshold: float = 0.8,
+                 max_postings: int = 100):
+        self.__n = n
+        self.__threshold = threshold
+        self.__max_postings = max_postings
+
+        self.__dois: Dict[str, str] = {}  # DOI -> document id
+        self.__ids: List[str] = []  # Title number -> document id
+        self.__sizes: List[int] = []  # Title number -> n-grams
+        self.__postings: Dict[int, List[int]] = defaultdict(list)
+
+    def __ngrams(self, s: str) -> set:
+        words = WORD.findall(s.lower())
+        return {
+            hash(tuple(words[i:i + self.__n]))
+            for i in range(len(words) - self.__n + 1)}
+
+    def add(self, doc: Document) -> None:
+        if doc.doi:
+            self.__dois[normalize_doi(doc.doi)] = doc.id
+
+        if not doc.title or not (ngrams := self.__ngrams(doc.title)):
+            return  # Titles shorter than n words are matched by DOI only
+
+        title = len(self.__ids)
+        self.__ids.append(doc.id)
+        self.__sizes.append(len(ngrams))
+        for ngram in ngrams:
+            self.__postings[ngram].append(title)
+
+    def link(self, reference: str) -> Tuple[str, str]:
+        """Cited document id and the matching method, or (None, None)"""
+        for doi in extract_doi(reference):
+            if doc_id := self.__dois.get(normalize_doi(doi)):
+                return doc_id, "doi"
+
+        hits = Counter()
+        for ngram in self.__ngrams(reference):
+            titles = self.__postings.get(ngram, [])
+            if len(titles) <= self.__max_postings:
+                hits.update(titles)
+
+        best, score = None, 0.0
+        for title, count in hits.items():
+            if (share := count / self.__sizes[title]) > score:
+                best, score = title, share
+
+        if best is None or score < self.__threshold:
+            return None, None
+        return self.__ids[best], "title"
+
+    def edges(self, documents: Iterable[Document]
+              ) -> Generator[Tuple[str, str, str], None, None]:
+        """(citing id, cited id, method) for every linked reference"""
+        for doc in documents:
+            cited = set()
+            for reference in doc.references or []:
+                doc_id, method = self.link(reference)
+                if doc_id and doc_id != doc.id and doc_id not in cited:
+                    cited.add(doc_id)
+                    yield doc.id, doc_id, method
+
+    def to_tsv(self, documents: Iterable[Document], path: Path) -> int:
+        n = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t")
+            for edge in self.edges(documents):
+                writer.writerow(edge)
+                n += 1
+        return n
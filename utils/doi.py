@@ -2,8 +2,9 @@ import re
 from hashlib import md5
 from pathlib import Path
 from typing import List
+from urllib.parse import quote
 
-from pandas import NA, Series, read_csv
+DOI_RESOLVER = "https://doi.org"
 
 
 def doi_to_md5(doi: str) -> str:
@@ -18,6 +19,8 @@ def doi_list_from_txt(path: Path) -> List[str]:
 
 
 def doi_list_from_tabular(path: Path, sep: str, column: str) -> List[str]:
+    from pandas import NA, Series, read_csv  # Slow to import, TXT lists skip it
+
     series: Series = read_csv(path, sep=sep, encoding="utf-8",
                               usecols=[column], na_values=NA).squeeze()
 
@@ -26,3 +29,27 @@ def doi_list_from_tabular(path: Path, sep: str, column: str) -> List[str]:
 
 def extract_doi(s: str) -> List[str]:
     return re.findall(r"(?P<doi>\d+\.\d+/\S+\b)", s, re.MULTILINE)
+
+
+def resolve_doi(doi: str, session: "requests.Session" = None,
+                timeout: int = 10, proxy: str = None) -> str:
+    """
+    Landing page URL registered for the DOI in the Handle System, without
+    visiting the publisher. Falls back to the resolver's redirect URL.
+    """
+    import requests
+
+    url = f"{DOI_RESOLVER}/{doi}"
+    try:
+        response = (session or requests).get(
+            f"{DOI_RESOLVER}/api/handles/{quote(doi, safe='/')}",
+            params={"type": "URL"}, timeout=timeout,
+            proxies={"http": proxy, "https": proxy} if proxy else None)
+        response.raise_for_status()
+
+        return next((
+            i["data"]["value"] for i in response.json().get("values", [])
+            if i.get("type") == "URL"), url)
+    except (requests.RequestException, ValueError, KeyError, TypeError,
+            AttributeError):  # Unreachable, or not the expected JSON
+        return url
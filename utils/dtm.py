@@ -0,0 +1,119 @@
+import shutil
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.search import InvertedIndex
+
+
+def extract_dtm(vocab: pd.DataFrame, doc_ids: Iterable[str],
+                index: InvertedIndex) -> Tuple[np.ndarray, ...]:
+    """
+    Document-term matrix of the documents in CSR form (indptr, indices,
+    data, doc ids), from the n-grams counted when they were indexed, so the
+    documents are not tokenized again
+    - Columns are the terms of the vocabulary (n-gram and count columns, as
+      extract_ngrams) in UTF-8 order, as in `vocab/`
+    - Rows follow `doc_ids`, documents missing from the index are empty
+    """
+    doc_ids = np.array([*doc_ids], dtype="S32")
+    indexed, terms, docs, tfs = index.read()
+
+    # Row of each indexed document, -1 if not in doc_ids
+    order = np.argsort(doc_ids)
+    positions = np.searchsorted(doc_ids[order], indexed).clip(
+        max=max(len(doc_ids) - 1, 0))
+    rows = np.where(
+        doc_ids[order][positions] == indexed, order[positions], -1) \
+        if len(doc_ids) else np.full(len(indexed), -1)
+
+    columns = np.unique(vocab.iloc[:, 0].to_numpy(dtype=str))
+    indices = np.searchsorted(columns, terms).clip(max=max(len(columns) - 1, 0))
+    keep = (rows[docs] >= 0) & (columns[indices] == terms) \
+        if len(columns) else np.zeros(len(terms), dtype=bool)
+
+    rows, indices, data = rows[docs[keep]], indices[keep], tfs[keep]
+    order = np.lexsort((indices, rows))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(
+        rows, minlength=len(doc_ids)))]).astype(np.uint64)
+    return (indptr, indices[order].astype(np.uint32),
+            data[order].astype(np.uint32), doc_ids)
+
+
+def tfidf(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray,
+          n_columns: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    TF-IDF weights of the CSR data, with smoothed idf (log((1 + n) / (1 + df))
+    + 1) and rows normalized to unit length. Returns the weights and the idf
+    """
+    n_rows = len(indptr) - 1
+    df = np.bincount(indices, minlength=n_columns)
+    idf = np.log((1 + n_rows) / (1 + df)) + 1
+
+    weights = data * idf[indices]
+    rows = np.repeat(np.arange(n_rows), np.diff(indptr).astype(np.int64))
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_rows))
+    weights /= np.where(norms, norms, 1)[rows]
+    return weights.astype(np.float32), idf.astype(np.float32)
+
+
+def write_dtm(path: Path, indptr: np.ndarray, indices: np.ndarray,
+              data: np.ndarray, doc_ids: np.ndarray, n_columns: int,
+              weights: bool = False) -> None:
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    np.save(tmp.joinpath("indptr.npy"), indptr)
+    np.save(tmp.joinpath("indices.npy"), indices)
+    np.save(tmp.joinpath("data.npy"), data)
+    np.save(tmp.joinpath("rows.npy"), doc_ids)
+    np.save(tmp.joinpath("shape.npy"), np.array(
+        [len(indptr) - 1, n_columns], dtype=np.uint64))
+
+    if weights:
+        tfidf_data, idf = tfidf(indptr, indices, data, n_columns)
+        np.save(tmp.joinpath("tfidf.npy"), tfidf_data)
+        np.save(tmp.joinpath("idf.npy"), idf)
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.replace(path)
+
+
+class DocumentTermMatrix:
+    """
+    Memory-mapped document-term matrix written by write_dtm
+    - Row i is the document `rows[i]`, column j is the j-th term of the
+      vocabulary in `vocab/`
+    - Values are n-gram counts, or TF-IDF weights if `tfidf` and they were
+      computed
+    """
+
+    def __init__(self, path: Path, tfidf: bool = False):
+        path = Path(path)
+        self.indptr = np.load(path.joinpath("indptr.npy"), mmap_mode="r")
+        self.indices = np.load(path.joinpath("indices.npy"), mmap_mode="r")
+        self.data = np.load(path.joinpath(
+            "tfidf.npy" if tfidf else "data.npy"), mmap_mode="r")
+        self.rows = np.load(path.joinpath("rows.npy"), mmap_mode="r")
+        self.shape = tuple(int(i) for i in np.load(path.joinpath("shape.npy")))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @property
+    def doc_ids(self) -> list:
+        return [i.decode("utf-8") for i in self.rows]
+
+    def row(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Columns and values of the i-th document"""
+        start, end = int(self.indptr[i]), int(self.indptr[i + 1])
+        return self.indices[start:end], self.data[start:end]
+
+    def tocsr(self):
+        """As a scipy.sparse.csr_matrix (requires scipy)"""
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
@@ -0,0 +1,191 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobQueue:
+    """
+    DOI queue shared by several workers through a SQLite database
+    - Workers lease batches of DOIs for `lease` seconds
+    - Heartbeats renew the leases, and the locks, of a live worker
+    - Expired leases (crashed workers) return to the queue until a DOI
+      exhausts `max_attempts`, then it is marked as failed
+    - Workers whose last heartbeat is older than a lease are not alive
+    """
+    PENDING: str = "pending"
+    LEASED: str = "leased"
+    DONE: str = "done"
+    FAILED: str = "failed"
+
+    def __init__(self, path: Path, lease: int = 300, max_attempts: int = 3):
+        self.__path = Path(path).absolute().resolve()
+        self.__path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.__lease = lease
+        self.__max_attempts = max_attempts
+
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(
+            f"{self.__path}", timeout=60,
+            isolation_level=None, check_same_thread=False)
+
+        with self.__transaction() as cur:
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "doi TEXT PRIMARY KEY, status TEXT NOT NULL, worker TEXT, "
+                "expires REAL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT)")
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS workers ("
+                "worker TEXT PRIMARY KEY, heartbeat REAL NOT NULL)")
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "name TEXT PRIMARY KEY, worker TEXT NOT NULL, "
+                "expires REAL NOT NULL)")
+
+    def __del__(self):
+        self.__conn.close()
+
+    @property
+    def lease_time(self) -> int:
+        return self.__lease
+
+    @contextmanager
+    def __transaction(self) -> sqlite3.Cursor:
+        with self.__lock:
+            cur = self.__conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            else:
+                cur.execute("COMMIT")
+            finally:
+                cur.close()
+
+    def seed(self, doi_list: Iterable[str]) -> None:
+        with self.__transaction() as cur:
+            cur.executemany(
+                "INSERT OR IGNORE INTO jobs (doi, status) VALUES (?, ?)",
+                [(doi.strip(), self.PENDING) for doi in doi_list])
+
+    def lease(self, worker: str, n: int = 10) -> List[str]:
+        now = time.time()
+        with self.__transaction() as cur:
+            self.__expire(cur, now)
+
+            dois = [row[0] for row in cur.execute(
+                "SELECT doi FROM jobs WHERE status = ? LIMIT ?",
+                (self.PENDING, n))]
+
+            cur.executemany(
+                "UPDATE jobs SET status = ?, worker = ?, expires = ?, "
+                "attempts = attempts + 1 WHERE doi = ?",
+                [(self.LEASED, worker, now + self.__lease, doi)
+                 for doi in dois])
+
+            self.__beat(cur, worker, now)
+        return dois
+
+    def heartbeat(self, worker: str) -> None:
+        now = time.time()
+        with self.__transaction() as cur:
+            cur.execute(
+                "UPDATE jobs SET expires = ? WHERE worker = ? AND status = ?",
+                (now + self.__lease, worker, self.LEASED))
+            cur.execute(
+                "UPDATE locks SET expires = ? WHERE worker = ?",
+                (now + self.__lease, worker))
+            self.__beat(cur, worker, now)
+
+    def complete(self, worker: str, doi: str, error: str = None) -> None:
+        with self.__transaction() as cur:
+            cur.execute(
+                "UPDATE jobs SET status = ?, worker = ?, expires = NULL, "
+                "error = ? WHERE doi = ?",
+                (self.FAILED if error else self.DONE, worker, error, doi))
+
+    def counts(self) -> Dict[str, int]:
+        with self.__transaction() as cur:
+            self.__expire(cur, time.time())
+            counts = dict(cur.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+        return {
+            status: counts.get(status, 0)
+            for status in (self.PENDING, self.LEASED, self.DONE, self.FAILED)}
+
+    def workers(self) -> Dict[str, int]:
+        """Live workers and the number of DOIs each one is leasing"""
+        with self.__transaction() as cur:
+            now = time.time()
+            cur.execute(
+                "DELETE FROM workers WHERE heartbeat < ?", (now - self.__lease,))
+            return dict(cur.execute(
+                "SELECT workers.worker, COUNT(jobs.doi) FROM workers "
+                "LEFT JOIN jobs ON jobs.worker = workers.worker "
+                "AND jobs.status = ? GROUP BY workers.worker", (self.LEASED,)))
+
+    @property
+    def drained(self) -> bool:
+        counts = self.counts()
+        return not (counts[self.PENDING] or counts[self.LEASED])
+
+    def acquire(self, name: str, worker: str) -> bool:
+        now = time.time()
+        with self.__transaction() as cur:
+            cur.execute(
+                "DELETE FROM locks WHERE name = ? AND expires < ?", (name, now))
+            cur.execute(
+                "INSERT OR IGNORE INTO locks (name, worker, expires) "
+                "VALUES (?, ?, ?)", (name, worker, now + self.__lease))
+            return cur.rowcount == 1
+
+    def release(self, name: str, worker: str) -> None:
+        with self.__transaction() as cur:
+            cur.execute(
+                "DELETE FROM locks WHERE name = ? AND worker = ?",
+                (name, worker))
+
+    @contextmanager
+    def keep_alive(self, worker: str, interval: float = None) -> None:
+        interval = interval or self.__lease / 3
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                self.heartbeat(worker)
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def __expire(self, cur: sqlite3.Cursor, now: float) -> None:
+        cur.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "worker = NULL, expires = NULL, error = CASE WHEN attempts >= ? "
+            "THEN 'Lease expired' ELSE NULL END "
+            "WHERE status = ? AND expires < ?",
+            (self.__max_attempts, self.FAILED, self.PENDING,
+             self.__max_attempts, self.LEASED, now))
+
+    def __beat(self, cur: sqlite3.Cursor, worker: str, now: float) -> None:
+        cur.execute(
+            "INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)",
+            (worker, now))
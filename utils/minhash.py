@@ -0,0 +1,128 @@
+import re
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Set
+
+import numpy as np
+
+WORD = re.compile(r"\w+")
+PRIME = np.uint64(4294967291)  # Largest prime below 2**32
+
+
+class MinHashLSH:
+    """
+    Incremental MinHash LSH index of documents' word shingles
+    - Signatures of `num_perm` hashes are split in `bands`, documents sharing
+      any band are candidates, so lookups only touch colliding buckets
+    - Candidates are near-duplicates if their estimated Jaccard similarity
+      is at least `threshold`
+    - A key added again (e.g. a document scraped twice) replaces its
+      signature, a document is never its own duplicate
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16,
+                 threshold: float = 0.8, shingle: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.__rows = num_perm // bands
+        self.__bands = bands
+        self.__threshold = threshold
+        self.__shingle = shingle
+
+        rng = np.random.default_rng(seed)
+        self.__a = rng.integers(1, 2 ** 31, num_perm, dtype=np.uint64)
+        self.__b = rng.integers(0, 2 ** 31, num_perm, dtype=np.uint64)
+
+        self.__ids: List[str] = []
+        self.__positions: Dict[str, int] = {}  # Key -> index in __ids
+        self.__signatures: List[np.ndarray] = []
+        self.__buckets: List[Dict[bytes, List[int]]] = [
+            defaultdict(list) for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+    def signature(self, text: str) -> np.ndarray:
+        words = WORD.findall(text.lower())
+        shingles = np.fromiter({
+            zlib.crc32(" ".join(words[i:i + self.__shingle]).encode("utf-8"))
+            for i in range(max(len(words) - self.__shingle + 1, 1))
+        }, dtype=np.uint64)
+
+        signature = np.full(len(self.__a), PRIME, dtype=np.uint64)
+        for i in range(0, len(shingles), 4096):  # Bounded memory
+            hashes = (np.outer(shingles[i:i + 4096], self.__a) +
+                      self.__b) % PRIME
+            np.minimum(signature, hashes.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def __bands_of(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[i * self.__rows:(i + 1) * self.__rows].tobytes()
+            for i in range(self.__bands)]
+
+    def __query(self, signature: np.ndarray) -> Set[int]:
+        candidates = set()
+        for band, bucket in zip(self.__buckets, self.__bands_of(signature)):
+            candidates.update(band.get(bucket, []))
+
+        return {
+            i for i in candidates
+            if np.mean(self.__signatures[i] == signature) >= self.__threshold}
+
+    def query(self, text: str) -> List[str]:
+        return [self.__ids[i] for i in self.__query(self.signature(text))]
+
+    def add(self, key: str, text: str) -> List[str]:
+        """Indexes the text and returns the keys of its near-duplicates"""
+        signature = self.signature(text)
+        duplicates = [
+            self.__ids[i] for i in self.__query(signature)
+            if self.__ids[i] != key]
+        self.__insert(key, signature)
+        return duplicates
+
+    def __insert(self, key: str, signature: np.ndarray) -> None:
+        if (n := self.__positions.get(key)) is not None:
+            for band, bucket in zip(
+                    self.__buckets, self.__bands_of(self.__signatures[n])):
+                band[bucket].remove(n)
+            self.__signatures[n] = signature
+        else:
+            n = self.__positions[key] = len(self.__ids)
+            self.__ids.append(key)
+            self.__signatures.append(signature)
+
+        for band, bucket in zip(self.__buckets, self.__bands_of(signature)):
+            band[bucket].append(n)
+
+    def clusters(self) -> List[List[str]]:
+        """Groups of near-duplicates, in insertion order"""
+        parent = list(range(len(self.__ids)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, signature in enumerate(self.__signatures):
+            for j in self.__query(signature):
+                parent[max(find(i), find(j))] = min(find(i), find(j))
+
+        groups: Dict[int, List[str]] = defaultdict(list)
+        for i, key in enumerate(self.__ids):
+            groups[find(i)].append(key)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def save(self, path: Path) -> None:
+        np.savez(path, ids=np.array(self.__ids, dtype=str),
+                 signatures=np.array(self.__signatures, dtype=np.uint32))
+
+    def load(self, path: Path) -> "MinHashLSH":
+        data = np.load(path)
+        for key, signature in zip(data["ids"], data["signatures"]):
+            self.__insert(f"{key}", signature)
+        return self
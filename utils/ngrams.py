@@ -0,0 +1,18 @@
+from typing import Dict, Iterable
+
+import pandas as pd
+
+from common.utils.text import extract_ngrams
+
+
+def document_ngrams(texts: Iterable[str]) -> Dict[str, int]:
+    """
+    N-gram counts of a single document, tokenized by extract_ngrams (the
+    same n-grams as vocab.tsv)
+    """
+    texts = pd.Series([i for i in texts if i])
+    if texts.empty:
+        return {}
+
+    vocab: pd.DataFrame = extract_ngrams(texts)
+    return dict(zip(vocab.iloc[:, 0], vocab.iloc[:, 1].astype(int)))
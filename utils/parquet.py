@@ -0,0 +1,148 @@
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from common.models.document import Document
+from sinks import as_record
+
+# Small, frequently read columns apart from the full text
+METADATA = pa.schema([
+    ("id", pa.string()),
+    ("doi", pa.string()),
+    ("url", pa.string()),
+    ("title", pa.string()),
+    ("authors", pa.list_(pa.string())),
+    ("source", pa.dictionary(pa.int32(), pa.string())),
+    ("date", pa.timestamp("ms")),
+    ("citations", pa.int64()),
+    ("error", pa.string())])
+TEXT = pa.schema([
+    ("id", pa.string()),
+    ("abstract", pa.string()),
+    ("content", pa.string()),
+    ("references", pa.list_(pa.string()))])
+
+DATASETS: Dict[str, pa.Schema] = {"metadata": METADATA, "text": TEXT}
+
+
+def to_datetime(value) -> datetime:
+    """Naive datetime of an ISO-8601 date (as saved), None if invalid"""
+    try:
+        return datetime.fromisoformat(f"{value}").replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def to_int(value) -> int:
+    """Count as scraped (e.g. "1,234"), None if not a number"""
+    try:
+        return int(float(re.sub(r"[,\s]", "", f"{value}")))
+    except (ValueError, OverflowError):
+        return None
+
+
+class ParquetStore:
+    """
+    Columnar copy of the corpus in two Parquet datasets, `metadata/` and
+    `text/`, so reading metadata columns never touches the full text
+    - Each append writes a new zstd-compressed part to both datasets,
+      `source` is dictionary-encoded
+    - A document appended again supersedes its previous rows, read() keeps
+      the latest and compact() rewrites the parts into a single one
+    """
+
+    def __init__(self, directory: Path, compression: str = "zstd"):
+        self.__directory = Path(directory)
+        self.__compression = compression
+        for dataset in DATASETS:
+            self.__directory.joinpath(dataset).mkdir(parents=True, exist_ok=True)
+
+    def __parts(self, dataset: str) -> List[Path]:
+        return sorted(self.__directory.joinpath(dataset).glob("part-*.parquet"))
+
+    def __write(self, table: pa.Table, dataset: str, name: str) -> None:
+        path = self.__directory.joinpath(dataset, name)
+        tmp = path.with_suffix(".tmp")  # Readers only list complete parts
+        pq.write_table(
+            table, tmp, compression=self.__compression,
+            use_dictionary=["source"] if dataset == "metadata" else False)
+        tmp.replace(path)
+
+    def append(self, documents: Iterable[Document]) -> int:
+        records = [as_record(doc) for doc in documents]
+        if not records:
+            return 0
+
+        def column(field: str) -> list:
+            return [record.get(field) for record in records]
+
+        tables = dict(
+            metadata=pa.table({
+                **{field: column(field) for field in
+                   ["id", "doi", "url", "title", "authors", "source", "error"]},
+                "date": [
+                    None if i is None else to_datetime(i) for i in column("date")],
+                "citations": [to_int(i) for i in column("citations")],
+            }, schema=METADATA),
+            text=pa.table({
+                field: column(field) for field in TEXT.names}, schema=TEXT))
+
+        name = f"part-{time.time_ns():020d}.parquet"
+        for dataset in ["text", "metadata"]:  # Metadata last, it lists the docs
+            self.__write(tables[dataset], dataset, name)
+        return len(records)
+
+    def read(self, dataset: str = "metadata", columns: List[str] = None,
+             latest: bool = True) -> pd.DataFrame:
+        """Columns of a dataset, with the latest row of each document"""
+        columns = None if columns is None else [
+            "id", *[i for i in columns if i != "id"]]
+        tables = [pq.read_table(part, columns=columns)
+                  for part in self.__parts(dataset)]
+        df = pa.concat_tables(tables).to_pandas() if tables else \
+            DATASETS[dataset].empty_table().to_pandas()[columns or slice(None)]
+        if latest:
+            df = df.drop_duplicates("id", keep="last")
+        return df.set_index("id")
+
+    def compact(self) -> None:
+        """
+        Rewrites each dataset into a single part, without superseded rows,
+        one part in memory at a time
+        """
+        for dataset, schema in DATASETS.items():
+            parts = self.__parts(dataset)
+            if len(parts) < 2:
+                continue
+
+            # Last part holding each document
+            last: Dict[str, int] = {}
+            for n, part in enumerate(parts):
+                for doc_id in pq.read_table(part, columns=["id"])["id"].to_pylist():
+                    last[doc_id] = n
+
+            path = self.__directory.joinpath(dataset, parts[-1].name)
+            tmp = path.with_suffix(".tmp")
+            with pq.ParquetWriter(
+                    tmp, schema, compression=self.__compression,
+                    use_dictionary=["source"] if dataset == "metadata" else False
+            ) as writer:
+                for n, part in enumerate(parts):
+                    table = pq.read_table(part)
+                    ids = table["id"].to_pylist()
+                    last_row = {doc_id: i for i, doc_id in enumerate(ids)}
+                    keep = [
+                        last[doc_id] == n and last_row[doc_id] == i
+                        for i, doc_id in enumerate(ids)]
+                    writer.write_table(table.filter(pa.array(keep)))
+
+            # Replaces the newest part first, so readers never miss a document
+            tmp.replace(path)
+            for part in parts[:-1]:
+                part.unlink()
@@ -0,0 +1,123 @@
+import json
+import re
+from collections import namedtuple
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Generator, Iterable, List, Tuple
+
+from common.models.document import Document
+
+Reference = namedtuple(
+    "Reference", ["authors", "year", "title", "venue", "doi", "raw"])
+
+NUMBERING = re.compile(r"^\s*(?:\[\d+\]|\d+\.(?=\s))\s*")
+DOI = re.compile(
+    r"(?:https?://(?:dx\.)?doi\.org/|\bdoi:\s*)?\b(?P<doi>10\.\d{4,9}/[^\s\"<>]+)",
+    re.IGNORECASE)
+URL = re.compile(r"\b(?:https?://|www\.)\S+", re.IGNORECASE)
+YEAR = re.compile(r"(?<!\d)(?P<year>1[89]\d{2}|20\d{2})(?!\d)")
+
+# IEEE, ACM: A. Author and B. Author, "Title," Venue, 2020.
+QUOTED = re.compile(
+    r"^(?P<authors>.*?)[\s,:]*[\"“‘](?P<title>.{4,}?)[,.]?"
+    r"[\"”’](?P<rest>.*)$")
+# APA, Springer, Wiley: Author, A., & Author, B. (2020). Title. Venue
+PARENTHESIZED_YEAR = re.compile(
+    r"^(?P<authors>.+?)[\s,]*\((?P<year>1[89]\d{2}|20\d{2})[a-z]?\)[.,:]?\s*"
+    r"(?P<rest>.*)$")
+# Vancouver, BMC: Author A, Author B. Title. Venue. 2020;1:2
+# Sentences do not end at initials ("J. Smith"), unless they follow a
+# surname ("Lee C. Title")
+SENTENCE = re.compile(
+    r"(?:(?<![\s.][A-Z])(?<!\bet al)|(?<=[a-z] [A-Z])|(?<=[a-z] [A-Z]{2})|"
+    r"(?<=[a-z] [A-Z]{3}))[.?!]\s+")
+
+AUTHOR_SEPARATOR = re.compile(r"\s*;\s*|,?\s+and\s+|\s*&\s*|\s*,\s*")
+INITIALS = re.compile(r"^(?:[A-Z][a-z]?\.?[\s-]*)+$")
+ET_AL = re.compile(r"\s*,?\s*\bet al\.?", re.IGNORECASE)
+
+
+def split_authors(authors: str) -> List[str]:
+    names: List[str] = []
+    for part in AUTHOR_SEPARATOR.split(ET_AL.sub("", authors)):
+        if not (part := part.strip(" .,")):
+            continue
+
+        # "Smith, J." was split in two, the initials belong to the surname
+        if names and INITIALS.match(part) and not INITIALS.match(names[-1]) \
+                and " " not in names[-1]:
+            names[-1] = f"{names[-1]}, {part}"
+        else:
+            names.append(part)
+    return names
+
+
+def parse_reference(raw: str) -> Reference:
+    s = NUMBERING.sub("", raw).strip()
+
+    doi = None
+    if match := DOI.search(s):
+        doi = match.group("doi").rstrip(".,;)]")
+        s = f"{s[:match.start()]}{s[match.end():]}"
+    s = URL.sub("", s).strip(" .,;")
+
+    authors, year, title, venue = "", None, None, None
+
+    if match := QUOTED.match(s):
+        authors, title, rest = match.group("authors", "title", "rest")
+        venue = YEAR.sub("", rest).strip(" ,.;:") or None
+        year = (years := YEAR.findall(rest)) and years[-1]
+    elif match := PARENTHESIZED_YEAR.match(s):
+        authors, year, rest = match.group("authors", "year", "rest")
+        parts = SENTENCE.split(rest, maxsplit=1)
+        title = parts[0]
+        venue = parts[1] if len(parts) > 1 else None
+    else:
+        parts = SENTENCE.split(s, maxsplit=2)
+        if len(parts) > 2:
+            authors, title, venue = parts
+        elif len(parts) == 2:
+            authors, title = parts
+        else:
+            title = s
+        year = (years := YEAR.findall(s)) and years[-1]
+
+        if venue:
+            venue = re.split(r"[.;]\s*(?=\d)", venue)[0]
+
+    def clean(s: str) -> str:
+        return s.strip(" ,.;:") if s and s.strip(" ,.;:") else None
+
+    return Reference(
+        authors=split_authors(authors),
+        year=int(year) if year else None,
+        title=clean(title),
+        venue=clean(venue),
+        doi=doi,
+        raw=raw)
+
+
+def parse_references(references: Iterable[str]) -> List[Reference]:
+    return [parse_reference(i) for i in references or []]
+
+
+def _parse_document(doc: Tuple[str, List[str]]) -> Tuple[str, List[Reference]]:
+    doc_id, references = doc
+    return doc_id, parse_references(references)
+
+
+def parse_corpus(documents: Iterable[Document], processes: int = None,
+                 chunksize: int = 64
+                 ) -> Generator[Tuple[str, List[Reference]], None, None]:
+    """(document id, parsed references) of each document, in parallel"""
+    with Pool(processes) as pool:
+        yield from pool.imap_unordered(
+            _parse_document,
+            ((doc.id, doc.references) for doc in documents),
+            chunksize=chunksize)
+
+
+def save_references(doc_id: str, references: List[Reference],
+                    output_dir: Path) -> None:
+    with open(Path(output_dir, f"{doc_id}.json"), "w", encoding="utf-8") as f:
+        json.dump([i._asdict() for i in references], f, ensure_ascii=False)
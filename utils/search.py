@@ -0,0 +1,469 @@
+import heapq
+import json
+import math
+import re
+import shutil
+import threading
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from common.models.document import Document
+from utils.ngrams import document_ngrams
+from utils.storage import StringTable, write_string_table
+
+FIELDS: List[str] = ["title", "abstract", "content"]
+
+
+def sort_postings(terms: np.ndarray, docs: np.ndarray, tfs: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Groups (term, doc, tf) postings by term. Returns the sorted unique terms
+    (code point order, which is also their UTF-8 bytes order), the start of
+    each term's postings and the documents and frequencies in that order.
+    """
+    unique, inverse = np.unique(terms, return_inverse=True)
+    order = np.lexsort((docs, inverse))
+    starts = np.concatenate([[0], np.cumsum(np.bincount(
+        inverse, minlength=len(unique)))]).astype(np.uint64)
+    return unique, starts, docs[order], tfs[order]
+
+
+class Segment:
+    """
+    Immutable, memory-mapped part of the index
+    - terms: sorted string table, postings.npy: start of each term's postings
+    - postings.bin: document deltas and term frequencies, zlib-compressed in
+      blocks of BLOCK postings (blocks.npy holds their offsets)
+    - docs.npy, lengths.npy: id and length (in n-grams) of each document
+    """
+    BLOCK: int = 16384
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.terms = StringTable(self.path.joinpath("terms"))
+        self.starts = np.load(self.path.joinpath("postings.npy"), mmap_mode="r")
+        self.blocks = np.load(self.path.joinpath("blocks.npy"), mmap_mode="r")
+        self.docs = np.load(self.path.joinpath("docs.npy"), mmap_mode="r")
+        self.lengths = np.load(self.path.joinpath("lengths.npy"), mmap_mode="r")
+
+        with open(self.path.joinpath("postings.bin"), "rb") as f:
+            self.__blob = np.memmap(f, dtype=np.uint8, mode="r") \
+                if self.blocks[-1] else b""
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def df(self, term: int) -> int:
+        return int(self.starts[term + 1] - self.starts[term])
+
+    def __block(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        values = np.frombuffer(zlib.decompress(
+            bytes(self.__blob[self.blocks[n]:self.blocks[n + 1]])),
+            dtype=np.uint32)
+        return np.split(values, 2)
+
+    def __range(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        blocks = [self.__block(n) for n in range(
+            start // self.BLOCK, (end - 1) // self.BLOCK + 1)]
+        offset = start - start // self.BLOCK * self.BLOCK
+        deltas = np.concatenate([i[0] for i in blocks])
+        tfs = np.concatenate([i[1] for i in blocks])
+        return deltas[offset:offset + end - start], tfs[offset:offset + end - start]
+
+    def postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        deltas, tfs = self.__range(
+            int(self.starts[term]), int(self.starts[term + 1]))
+        return np.cumsum(deltas, dtype=np.int64), tfs
+
+    def read(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Term, document and frequency of every posting"""
+        counts = np.diff(self.starts).astype(np.int64)
+        if not len(counts):
+            return (np.array([], dtype=str), np.array([], dtype=np.int64),
+                    np.array([], dtype=np.uint32))
+
+        deltas, tfs = self.__range(0, int(self.starts[-1]))
+        cumsum = np.cumsum(deltas, dtype=np.int64)
+        starts = self.starts[:-1].astype(np.int64)
+        docs = cumsum - np.repeat(cumsum[starts] - deltas[starts], counts)
+        return np.repeat(np.array([*self.terms]), counts), docs, tfs
+
+    @classmethod
+    def write(cls, path: Path, doc_ids: List[str], lengths: List[int],
+              terms: np.ndarray, starts: np.ndarray, docs: np.ndarray,
+              tfs: np.ndarray) -> None:
+        tmp = path.with_name(f"{path.name}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        write_string_table(tmp.joinpath("terms"), terms)
+
+        deltas = docs.astype(np.uint32)
+        deltas[1:] -= docs[:-1].astype(np.uint32)
+        firsts = starts[:-1].astype(np.int64)
+        deltas[firsts] = docs[firsts]
+
+        blocks = [0]
+        with open(tmp.joinpath("postings.bin"), "wb") as f:
+            for i in range(0, len(deltas), cls.BLOCK):
+                blocks.append(blocks[-1] + f.write(zlib.compress(np.concatenate([
+                    deltas[i:i + cls.BLOCK],
+                    tfs[i:i + cls.BLOCK].astype(np.uint32)]).tobytes())))
+
+        np.save(tmp.joinpath("postings.npy"), starts.astype(np.uint64))
+        np.save(tmp.joinpath("blocks.npy"), np.array(blocks, dtype=np.uint64))
+        np.save(tmp.joinpath("docs.npy"), np.array(doc_ids, dtype="S32"))
+        np.save(tmp.joinpath("lengths.npy"), np.array(lengths, dtype=np.uint32))
+
+        tmp.replace(path)
+
+
+class InvertedIndex:
+    """
+    Incremental full-text index of the corpus' title, abstract and content
+    (or of the given `fields`)
+    - Documents are tokenized with the vocabulary's n-grams, or their
+      n-grams are given (e.g. already counted for another index)
+    - Added documents are buffered and flushed as a new segment every
+      `segment_size` documents, segments are listed in `segments.json`
+    - A document added again supersedes its previous rows, which are left
+      out of the statistics and results (the latest segment holding the
+      document wins). The live rows are saved in `live.npz` as segments
+      are written, so queries do not look for superseded documents
+    - Once there are more than `merge_factor` segments, the `merge_factor`
+      consecutive ones with the fewest documents are merged into one in a
+      background thread, without the superseded rows
+    - Queries are ranked with BM25 over all segments
+    """
+
+    def __init__(self, path: Path, segment_size: int = 1000,
+                 merge_factor: int = 8, k1: float = 1.2, b: float = 0.75,
+                 fields: List[str] = FIELDS):
+        self.__path = Path(path).absolute().resolve()
+        self.__path.mkdir(parents=True, exist_ok=True)
+        self.__manifest = self.__path.joinpath("segments.json")
+        self.__live_path = self.__path.joinpath("live.npz")
+
+        self.__segment_size = segment_size
+        self.__merge_factor = merge_factor
+        self.__k1, self.__b = k1, b
+        self.__fields = fields
+
+        self.__buffer: List[Tuple[str, Dict[str, int]]] = []
+        self.__segments: Dict[str, Segment] = {}  # Opened segments
+        # Segment names -> live rows of each segment, live documents and
+        # their total length
+        self.__live: Tuple[Tuple[str, ...], List[np.ndarray], int, float] = \
+            ((), [], 0, 0.0)
+
+        self.__lock = threading.Lock()
+        self.__merger: threading.Thread = None
+
+    # Writing
+    def __read_manifest(self) -> List[str]:
+        if not self.__manifest.is_file():
+            return []
+        with open(self.__manifest, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def __write_manifest(self, segments: List[str]) -> None:
+        tmp = self.__manifest.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(segments, f)
+        tmp.replace(self.__manifest)
+
+    def __new_segment_name(self) -> str:
+        names = [p.name for p in self.__path.glob("seg_*") if p.is_dir()]
+        n = max([int(i.split("_")[1].split(".")[0]) for i in names] + [0])
+        return f"seg_{n + 1:08d}"
+
+    def add(self, doc: Document, ngrams: Dict[str, int] = None) -> None:
+        if ngrams is None:
+            ngrams = document_ngrams([
+                getattr(doc, field) for field in self.__fields])
+        self.add_ngrams(doc.id, ngrams)
+
+    def add_ngrams(self, doc_id: str, ngrams: Dict[str, int]) -> None:
+        if not ngrams:
+            return
+
+        self.__buffer.append((doc_id, ngrams))
+        if len(self.__buffer) >= self.__segment_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.__buffer:
+            return
+
+        counts = [len(ngrams) for _, ngrams in self.__buffer]
+        terms = np.array([
+            term for _, ngrams in self.__buffer for term in ngrams])
+        docs = np.repeat(np.arange(len(self.__buffer)), counts)
+        tfs = np.fromiter((
+            tf for _, ngrams in self.__buffer for tf in ngrams.values()),
+            dtype=np.uint32, count=len(terms))
+
+        doc_ids = np.array([doc_id for doc_id, _ in self.__buffer], dtype="S32")
+        with self.__lock:
+            name = self.__new_segment_name()
+            Segment.write(
+                self.__path.joinpath(name), doc_ids,
+                [sum(ngrams.values()) for _, ngrams in self.__buffer],
+                *sort_postings(terms, docs, tfs))
+
+            # The new rows supersede those of the same documents
+            names = self.__read_manifest()
+            segments = [self.__segment(i) for i in names]
+            live = [
+                mask & ~np.isin(segment.docs, doc_ids) for segment, mask in
+                zip(segments, self.__live_rows(names, segments)[0])]
+            last = len(doc_ids) - 1 - np.unique(
+                doc_ids[::-1], return_index=True)[1]
+            live.append(np.isin(np.arange(len(doc_ids)), last))
+
+            names.append(name)
+            self.__write_live([*segments, self.__segment(name)], names, live)
+            self.__write_manifest(names)
+
+        self.__buffer.clear()
+        self.__maybe_merge()
+
+    def close(self) -> None:
+        self.flush()
+        if self.__merger:
+            self.__merger.join()
+
+    def __maybe_merge(self) -> None:
+        if self.__merger and self.__merger.is_alive():
+            return
+        if len(self.__read_manifest()) <= self.__merge_factor:
+            return
+
+        self.__merger = threading.Thread(target=self.merge, daemon=True)
+        self.__merger.start()
+
+    def merge(self) -> None:
+        """
+        Merges the `merge_factor` consecutive segments with the fewest live
+        documents, the merged segment takes their place in the manifest so
+        later segments still hold the latest versions
+        """
+        names, segments = self.__open()
+        live = self.__live_rows(names, segments)[0]
+
+        window = min(self.__merge_factor, len(names))
+        if window < 2:
+            return
+        totals = np.convolve(
+            [int(mask.sum()) for mask in live], np.ones(window, dtype=int),
+            mode="valid")
+        first = int(np.argmin(totals))
+        selected = names[first:first + window]
+        merged = live[first:first + window]
+
+        doc_ids, lengths, terms, docs, tfs = self.__read_live(
+            segments[first:first + window], merged)
+
+        with self.__lock:
+            name = self.__new_segment_name()
+            Segment.write(
+                self.__path.joinpath(name), doc_ids, lengths,
+                *sort_postings(terms, docs, tfs))
+
+            # Flushes only append to the manifest, the run is still in place,
+            # but they may have superseded some of the merged rows since
+            names = self.__read_manifest()
+            segments = [self.__segment(i) for i in names]
+            live = [*self.__live_rows(names, segments)[0]]
+            first = names.index(selected[0])
+            live[first:first + window] = [np.concatenate([
+                now[before] for now, before in
+                zip(live[first:first + window], merged)])]
+            names[first:first + window] = [name]
+            segments[first:first + window] = [self.__segment(name)]
+
+            self.__write_live(segments, names, live)
+            self.__write_manifest(names)
+
+            # Searches open their segments under the lock, those already
+            # opened keep reading the memory-mapped files
+            for old in selected:
+                self.__segments.pop(old, None)
+                shutil.rmtree(self.__path.joinpath(old), ignore_errors=True)
+
+    @staticmethod
+    def __read_live(segments: List[Segment], live: List[np.ndarray]
+                    ) -> Tuple[np.ndarray, ...]:
+        """
+        Ids and lengths of the live documents of the segments, then the
+        term, document (position in the ids) and frequency of their postings
+        """
+        doc_ids, lengths, terms, docs, tfs, base = [], [], [], [], [], 0
+        for segment, mask in zip(segments, live):
+            rows = np.cumsum(mask) - 1  # Position among the live documents
+            segment_terms, segment_docs, segment_tfs = segment.read()
+            keep = mask[segment_docs]
+            terms.append(segment_terms[keep])
+            docs.append(rows[segment_docs[keep]] + base)
+            tfs.append(segment_tfs[keep])
+
+            doc_ids.append(segment.docs[mask])
+            lengths.append(segment.lengths[mask])
+            base += int(mask.sum())
+
+        if not segments:
+            return (np.array([], dtype="S32"), np.array([], dtype=np.uint32),
+                    np.array([], dtype=str), np.array([], dtype=np.int64),
+                    np.array([], dtype=np.uint32))
+        return tuple(np.concatenate(i) for i in [
+            doc_ids, lengths, terms, docs, tfs])
+
+    def read(self) -> Tuple[np.ndarray, ...]:
+        """
+        Ids of the documents flushed to the index (their latest version),
+        then the term, document (position in the ids) and frequency of
+        their postings
+        """
+        names, segments = self.__open()
+        live = self.__live_rows(names, segments)[0]
+        doc_ids, _, terms, docs, tfs = self.__read_live(segments, live)
+        return doc_ids, terms, docs, tfs
+
+    # Reading
+    def __segment(self, name: str) -> Segment:
+        if name not in self.__segments:
+            self.__segments[name] = Segment(self.__path.joinpath(name))
+        return self.__segments[name]
+
+    def __open(self) -> Tuple[List[str], List[Segment]]:
+        """Names and opened segments of the manifest"""
+        while True:
+            with self.__lock:
+                names = self.__read_manifest()
+                try:
+                    return names, [self.__segment(name) for name in names]
+                except FileNotFoundError:
+                    # Merged by another process since the manifest was read,
+                    # the manifest now lists the merged segment
+                    continue
+
+    def __live_rows(self, names: List[str], segments: List[Segment]
+                    ) -> Tuple[List[np.ndarray], int, float]:
+        """
+        Rows of each segment holding the latest version of their document,
+        the number of live documents and their total length
+        """
+        if self.__live[0] != tuple(names):
+            self.__live = self.__load_live(names) or \
+                self.__find_live(names, segments)
+        return self.__live[1:]
+
+    def __load_live(self, names: List[str]
+                    ) -> Tuple[Tuple[str, ...], List[np.ndarray], int, float]:
+        """Live rows saved with the segments, None if not for these ones"""
+        try:
+            with np.load(self.__live_path) as data:
+                if data["names"].tolist() != names:
+                    return None  # Written meanwhile, the manifest is newer
+                masks = np.split(data["live"], np.cumsum(
+                    data["sizes"])[:-1]) if names else []
+                return (tuple(names), masks, int(data["n_docs"]),
+                        float(data["total_length"]))
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def __find_live(names: List[str], segments: List[Segment]
+                    ) -> Tuple[Tuple[str, ...], List[np.ndarray], int, float]:
+        """Live rows from the ids of every segment, when none were saved"""
+        docs = np.concatenate([segment.docs for segment in segments]) \
+            if segments else np.array([], dtype="S32")
+        # Last occurrence of each document, in manifest order
+        last = len(docs) - 1 - np.unique(docs[::-1], return_index=True)[1]
+        live = np.zeros(len(docs), dtype=bool)
+        live[last] = True
+
+        masks = np.split(live, np.cumsum(
+            [len(segment) for segment in segments])[:-1].astype(np.int64)) \
+            if segments else []
+        return (tuple(names), masks, int(live.sum()), sum(
+            float(segment.lengths[mask].sum())
+            for segment, mask in zip(segments, masks)))
+
+    def __write_live(self, segments: List[Segment], names: List[str],
+                     masks: List[np.ndarray]) -> None:
+        """Saves the live rows of the segments, before the manifest lists them"""
+        n_docs = sum(int(mask.sum()) for mask in masks)
+        total_length = sum(
+            float(segment.lengths[mask].sum())
+            for segment, mask in zip(segments, masks))
+
+        tmp = self.__live_path.with_name("live.tmp.npz")
+        np.savez(
+            tmp, names=np.array(names, dtype=str),
+            sizes=np.array([len(mask) for mask in masks], dtype=np.int64),
+            live=np.concatenate(masks) if masks else np.array([], dtype=bool),
+            n_docs=n_docs, total_length=total_length)
+        tmp.replace(self.__live_path)
+
+        self.__live = (tuple(names), masks, n_docs, total_length)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Ids and BM25 scores of the `k` best matching documents"""
+        terms = [*document_ngrams([query])]
+        names, segments = self.__open()
+        live, n_docs, total_length = self.__live_rows(names, segments)
+        if not n_docs or not terms:
+            return []
+        avg_length = total_length / n_docs
+
+        # Live postings of the terms in each segment, global document
+        # frequencies
+        found: List[Dict[str, Tuple[np.ndarray, np.ndarray]]] = []
+        df = defaultdict(int)
+        for segment, mask in zip(segments, live):
+            found.append({})
+            for term in terms:
+                if (i := segment.terms.find(term)) < 0:
+                    continue
+                docs, tfs = segment.postings(i)
+                keep = mask[docs]
+                if keep.any():
+                    found[-1][term] = docs[keep], tfs[keep]
+                    df[term] += int(keep.sum())
+
+        # A document is live in a single segment
+        scores: Dict[bytes, float] = {}
+        for segment, postings in zip(segments, found):
+            segment_scores = np.zeros(len(segment))
+            for term, (docs, tfs) in postings.items():
+                idf = math.log(1 + (n_docs - df[term] + .5) / (df[term] + .5))
+                norm = self.__k1 * (1 - self.__b + self.__b *
+                                    segment.lengths[docs] / avg_length)
+                segment_scores[docs] += idf * tfs * (self.__k1 + 1) / (tfs + norm)
+
+            for doc in np.flatnonzero(segment_scores):
+                scores[segment.docs[doc]] = segment_scores[doc]
+
+        return [
+            (doc_id.decode("utf-8"), float(score))
+            for doc_id, score in heapq.nlargest(
+                k, scores.items(), key=lambda i: i[1])]
+
+
+def snippet(text: str, query: str, width: int = 160) -> str:
+    """Window of `text` around the first occurrence of a query word"""
+    if not text:
+        return ""
+
+    words = [re.escape(i) for i in re.findall(r"\w+", query) if len(i) > 2]
+    match = re.search(
+        rf"\b(?:{'|'.join(words)})", text, re.IGNORECASE) if words else None
+
+    start = max((match.start() if match else 0) - width // 3, 0)
+    window = re.sub(r"\s+", " ", text[start:start + width]).strip()
+    return f"{'...' if start else ''}{window}..."
@@ -0,0 +1,75 @@
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+
+
+def write_string_table(path: Path, strings: Iterable[str]) -> int:
+    """
+    Writes the strings, which must be sorted by their UTF-8 bytes, as a blob
+    (`{path}.str`) and an offsets array (`{path}.off.npy`)
+    """
+    offsets = [0]
+    with open(f"{path}.str", "wb") as f:
+        for s in strings:
+            offsets.append(offsets[-1] + f.write(s.encode("utf-8")))
+
+    np.save(f"{path}.off.npy", np.array(offsets, dtype=np.uint64))
+    return len(offsets) - 1
+
+
+class StringTable:
+    """
+    Sorted string table written by write_string_table, memory-mapped, so
+    loading is O(1) and lookups are O(log n) binary searches
+    """
+
+    def __init__(self, path: Path):
+        self.__offsets = np.load(f"{path}.off.npy", mmap_mode="r")
+        self.__blob = np.memmap(f"{path}.str", dtype=np.uint8, mode="r") \
+            if self.__offsets[-1] else np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.__offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        return self.__blob[self.__offsets[i]:self.__offsets[i + 1]].tobytes()
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def bisect(self, key: bytes, lo: int = 0, hi: int = None) -> int:
+        """First position whose string is not lower than `key`"""
+        hi = len(self) if hi is None else hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, s: str) -> int:
+        key = s.encode("utf-8")
+        i = self.bisect(key)
+        return i if i < len(self) and self.raw(i) == key else -1
+
+    def prefix_range(self, prefix: str, lo: int = 0,
+                     hi: int = None) -> Tuple[int, int]:
+        """Positions [start, end) of the strings starting with `prefix`"""
+        key = prefix.encode("utf-8")
+        start = self.bisect(key, lo, hi)
+
+        hi = len(self) if hi is None else hi
+        lo, end = start, hi
+        while lo < end:
+            mid = (lo + end) // 2
+            if self.raw(mid)[:len(key)] <= key:
+                lo = mid + 1
+            else:
+                end = mid
+        return start, lo
@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import requests
+
+# Result of a conditional request, with the validators of the current page
+Probe = namedtuple("Probe", ["modified", "etag", "last_modified"])
+
+
+class Validators:
+    """
+    ETag and Last-Modified of each page, from its last refresh, so the
+    publisher can answer 304 Not Modified without sending the page again
+    - Pages whose publisher ignores conditional requests are always
+      considered modified
+    - Pages can be probed from several threads at once
+    """
+
+    def __init__(self, path: Path):
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(f"{path}", check_same_thread=False)
+        self.__conn.execute("""
+            CREATE TABLE IF NOT EXISTS validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                refreshed_at REAL
+            )""")
+        self.__conn.commit()
+
+    def probe(self, url: str, session: requests.Session,
+              timeout: int = 10) -> Probe:
+        with self.__lock:
+            row = self.__conn.execute(
+                "SELECT etag, last_modified FROM validators WHERE url = ?",
+                (url,)).fetchone()
+        etag, last_modified = row or (None, None)
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:  # Streamed, the body is never downloaded
+            with session.get(url, headers=headers, timeout=timeout,
+                             stream=True) as response:
+                if headers and response.status_code == 304:
+                    return Probe(False, etag, last_modified)
+                if response.ok:
+                    return Probe(True, response.headers.get("ETag"),
+                                 response.headers.get("Last-Modified"))
+        except requests.RequestException:
+            pass
+        return Probe(True, None, None)
+
+    def update(self, url: str, probe: Probe) -> None:
+        """Records the validators once the page was refreshed"""
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?)",
+                (url, probe.etag, probe.last_modified, time.time()))
@@ -0,0 +1,93 @@
+import shutil
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.storage import StringTable, write_string_table
+
+
+def write_vocab(path: Path, vocab: pd.DataFrame) -> None:
+    """
+    Writes the vocabulary (n-gram and count columns, as extract_ngrams)
+    in a memory-mappable directory
+    - terms: string table sorted by UTF-8 bytes
+    - counts.npy: count of each term
+    - prefix.npy: position of the first term starting with each byte
+    - rank.npy: terms by descending count, for top-k queries
+    """
+    path = Path(path)
+    terms = vocab.iloc[:, 0].astype(str).to_numpy()
+    counts = vocab.iloc[:, 1].to_numpy(dtype=np.uint64)
+
+    order = np.argsort(terms, kind="stable")  # Code point order = UTF-8 order
+    terms, counts = terms[order], counts[order]
+
+    tmp = path.with_name(f"{path.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    write_string_table(tmp.joinpath("terms"), terms)
+    first_bytes = np.fromiter(
+        (term.encode("utf-8")[0] if term else -1 for term in terms),
+        dtype=np.int16, count=len(terms))
+
+    np.save(tmp.joinpath("counts.npy"), counts)
+    np.save(tmp.joinpath("prefix.npy"), np.searchsorted(
+        first_bytes, np.arange(257)).astype(np.uint64))
+    np.save(tmp.joinpath("rank.npy"), np.argsort(
+        -counts.astype(np.int64), kind="stable").astype(np.uint64))
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp.replace(path)
+
+
+class Vocabulary:
+    """
+    Read-only vocabulary written by write_vocab
+    - Loading only maps the files, whatever the vocabulary size
+    - Term lookups and prefix scans are binary searches within the range
+      of the term's first byte
+    """
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        self.__terms = StringTable(path.joinpath("terms"))
+        self.__counts = np.load(path.joinpath("counts.npy"), mmap_mode="r")
+        self.__prefix = np.load(path.joinpath("prefix.npy"), mmap_mode="r")
+        self.__rank = np.load(path.joinpath("rank.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.__terms)
+
+    def __getitem__(self, i: int) -> Tuple[str, int]:
+        return self.__terms[i], int(self.__counts[i])
+
+    def __contains__(self, term: str) -> bool:
+        return self.index(term) >= 0
+
+    def __range(self, s: str) -> Tuple[int, int]:
+        if not s:
+            return 0, len(self)
+        first = s.encode("utf-8")[0]
+        return int(self.__prefix[first]), int(self.__prefix[first + 1])
+
+    def index(self, term: str) -> int:
+        """Position of the term (its column in the DTM), -1 if missing"""
+        key = term.encode("utf-8")
+        i = self.__terms.bisect(key, *self.__range(term))
+        return i if i < len(self) and self.__terms.raw(i) == key else -1
+
+    def count(self, term: str) -> int:
+        return int(self.__counts[i]) if (i := self.index(term)) >= 0 else 0
+
+    def prefix(self, prefix: str, limit: int = None) -> List[Tuple[str, int]]:
+        """Terms starting with `prefix` and their counts, sorted"""
+        start, end = self.__terms.prefix_range(prefix, *self.__range(prefix))
+        if limit is not None:
+            end = min(end, start + limit)
+        return [self[i] for i in range(start, end)]
+
+    def top(self, k: int = 10) -> List[Tuple[str, int]]:
+        return [self[int(i)] for i in self.__rank[:k]]
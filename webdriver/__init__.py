@@ -1,11 +1,15 @@
+import threading
 import time
-from collections import namedtuple
+from collections import deque, namedtuple
 from contextlib import contextmanager
+from datetime import datetime
 from os.path import getctime
 from pathlib import Path
 from sys import platform
-from typing import List
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Tuple
 
+import psutil
 from selenium.common.exceptions import (NoSuchElementException,
                                         StaleElementReferenceException,
                                         TimeoutException)
@@ -17,16 +21,30 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from seleniumwire import webdriver
 
+from webdriver.download import Downloader
+from webdriver.proxy import Proxy, ProxyPool
+from webdriver.watchdog import DeadlineExceeded
+
 ResponseStatus = namedtuple("ResponseStatus", ["status", "code"])
 
+# Requests captured by seleniumwire and kept in memory, the oldest are dropped
+REQUEST_STORAGE_SIZE = 500
+# Responses to page navigations kept apart, subrequests never push them out
+DOCUMENT_STORAGE_SIZE = 100
+# Seconds a tab may spend loading when there is no page load timeout
+NAVIGATION_TIMEOUT = 120
+
 
 class WebDriver:
-    def __init__(self):
+    def __init__(self, download_dir: Path = None, proxies: ProxyPool = None,
+                 page_load_timeout: int = None, download_timeout: int = 60,
+                 download_workers: int = 4):
         self.__geckodriver = Path(__file__).parent.absolute().joinpath(
             "geckodriver"
         ).resolve()
 
-        self.__download_dir = Path(".").absolute().joinpath(".data").resolve()
+        self.__download_dir = Path(
+            download_dir or Path(".", ".data")).absolute().resolve()
         self.__download_dir.mkdir(parents=True, exist_ok=True)
 
         self.__options = FirefoxOptions()
@@ -70,21 +88,86 @@ class WebDriver:
             self.__options.set_preference(*pref)
 
         self.__browser = None
+        self.__lock = threading.Lock()  # Browser swapped while abort() reads it
+
+        self.__proxies: ProxyPool = proxies
+        self.__proxy: Proxy = None
+
+        self.__navigations: Dict[str, float] = {}  # Tab handle -> start time
+        self.__pages: Dict[str, datetime] = {}  # Tab handle -> last navigation
+        # (Time, url, status code) of the documents loaded in any tab
+        self.__documents: Deque[Tuple[datetime, str, int]] = deque(
+            maxlen=DOCUMENT_STORAGE_SIZE)
+
+        self.__page_load_timeout = page_load_timeout
+        self.__download_timeout = download_timeout
+
+        self.__downloader = Downloader(
+            self.__download_dir, workers=download_workers,
+            timeout=download_timeout)
 
     def __connect(self):
-        self.__browser = webdriver.Firefox(
+        seleniumwire_options = {
+            "request_storage": "memory",
+            "request_storage_max_size": REQUEST_STORAGE_SIZE}
+        if self.__proxies:
+            self.__proxy = self.__proxies.acquire()
+            seleniumwire_options["proxy"] = {
+                "http": self.__proxy.url,
+                "https": self.__proxy.url,
+                "no_proxy": "localhost,127.0.0.1"}
+
+        browser = webdriver.Firefox(
             executable_path=f"{self.__geckodriver}.{self.__driver_ext()}",
             service_log_path=f"{self.__geckodriver}.log",
             capabilities=DesiredCapabilities.FIREFOX,
-            options=self.__options)
+            options=self.__options,
+            seleniumwire_options=seleniumwire_options)
+        self.__documents.clear()  # Of the previous browser
+        browser.response_interceptor = self.__capture
+        with self.__lock:
+            self.__browser = browser
+
+        if self.__page_load_timeout:
+            self.__browser.set_page_load_timeout(self.__page_load_timeout)
+
+    def __capture(self, request, response) -> None:
+        """Records the responses to navigations (called by seleniumwire)"""
+        dest = request.headers.get("Sec-Fetch-Dest")
+        if dest == "document" or dest is None and "html" in (
+                response.headers.get("Content-Type") or ""):
+            self.__documents.append(
+                (datetime.now(), request.url, response.status_code))
 
     def __disconnect(self):
-        if self.__browser:
-            self.__browser.quit()
-            del self.__browser
-            self.__browser = None
+        with self.__lock:
+            browser = self.__browser
+        if browser:
+            try:
+                browser.quit()
+            except Exception:  # Browser already killed by abort()
+                pass
+            with self.__lock:
+                self.__browser = None
+
+    def abort(self) -> None:
+        """Kills the browser, any call blocked on it fails right away"""
+        with self.__lock:
+            browser = self.__browser
+        if browser is None:
+            return
+
+        if (process := getattr(browser.service, "process", None)) is None:
+            return
+        try:
+            for child in psutil.Process(process.pid).children(recursive=True):
+                child.kill()
+        except psutil.Error:
+            pass
+        process.kill()
 
-    def wait_for_download_queue(self, timeout: int = 60) -> Path:
+    def wait_for_download_queue(self, timeout: int = None) -> Path:
+        timeout = timeout or self.__download_timeout
         initial_pdf_count = len([*Path(self.__download_dir).glob("*.pdf")])
 
         for _ in range(timeout):
@@ -94,8 +177,7 @@ class WebDriver:
                 break
             time.sleep(1)
         else:
-            raise TimeoutError(
-                f"No download queue was detected within {timeout} seconds")
+            raise DeadlineExceeded("download", timeout)
 
         return self.download_list()[0]
 
@@ -113,12 +195,37 @@ class WebDriver:
         if not self.__browser:
             return ResponseStatus(False, 500)
 
-        request = next(filter(
-            lambda i: (
-                self.__browser.current_url in i.url and
-                i.response and i.response.status_code < 400
-            ), self.__browser.requests), None)
-        return ResponseStatus(True, request.response.status_code)
+        # Only the documents of the current tab's last navigation
+        started = self.__pages.get(self.__browser.current_window_handle)
+        url = self.__browser.current_url
+        codes = [
+            code for date, document_url, code in [*self.__documents]
+            if url in document_url and (started is None or date >= started)]
+
+        if code := next(filter(lambda i: i < 400, codes), None):
+            return ResponseStatus(True, code)
+        return ResponseStatus(False, codes[-1] if codes else 500)
+
+    @property
+    def proxy(self) -> Proxy:
+        return self.__proxy
+
+    @property
+    def proxy_stats(self) -> List[Dict]:
+        return self.__proxies.stats() if self.__proxies else []
+
+    def download(self, url: str, then: Callable[[Path], object]) -> Future:
+        """
+        Fetches `url` in background with the session's cookies, see
+        Downloader.submit
+        """
+        return self.__downloader.submit(
+            url, then, cookies=self.__browser.get_cookies(),
+            headers={
+                "User-Agent": self.__browser.execute_script(
+                    "return navigator.userAgent;"),
+                "Referer": self.__browser.current_url},
+            proxy=self.__proxy.url if self.__proxy else None)
 
     def download_list(self, n: int = 1, descending: bool = True) -> List[str]:
         return sorted(
@@ -128,12 +235,90 @@ class WebDriver:
     @contextmanager
     def get(self, url: str) -> None:
         self.__connect()
-        self.__browser.get(url)
-        self.wait_for_url_change()
 
-        yield self
+        started = time.time()
+        try:
+            self.__browser.get(url)
+        except Exception as e:  # Also connection errors, once abort() killed it
+            if self.__proxy:
+                self.__proxies.report(self.__proxy, time.time() - started)
+            self.__disconnect()
+            if isinstance(e, TimeoutException):
+                raise DeadlineExceeded("load", self.__page_load_timeout) from e
+            raise
 
-        self.__disconnect()
+        try:
+            if self.__proxy:
+                self.__proxies.report(
+                    self.__proxy, time.time() - started, self.response.code)
+
+            self.wait_for_url_change()
+
+            yield self
+        finally:
+            self.__disconnect()
+
+    @contextmanager
+    def session(self) -> None:
+        """Keeps a single browser open, pages are loaded in its tabs"""
+        self.__connect()
+        try:
+            yield self
+        finally:
+            self.__navigations.clear()
+            self.__pages.clear()
+            self.__disconnect()
+
+    def open_tabs(self, n: int) -> List[str]:
+        handles = [self.__browser.current_window_handle]
+        for _ in range(n - 1):
+            self.__browser.switch_to.new_window("tab")
+            handles.append(self.__browser.current_window_handle)
+        return handles
+
+    def switch_to(self, handle: str) -> None:
+        if self.__browser.current_window_handle != handle:
+            self.__browser.switch_to.window(handle)
+
+    def navigate(self, handle: str, url: str) -> None:
+        """Starts loading `url` in the tab without waiting for it"""
+        self.switch_to(handle)
+        self.__pages[handle] = datetime.now()
+        self.__browser.execute_script(
+            "window.__stale = true; window.location.href = arguments[0];", url)
+        self.__navigations[handle] = time.time()
+
+    def loading_time(self, handle: str) -> float:
+        if started := self.__navigations.get(handle):
+            return time.time() - started
+        return 0.0
+
+    def load_expired(self, handle: str) -> bool:
+        """
+        Whether the tab's navigation exceeded the page load timeout, it may
+        never complete (e.g. the page triggered a download)
+        """
+        return self.loading_time(handle) > (
+            self.__page_load_timeout or NAVIGATION_TIMEOUT)
+
+    def stop(self, handle: str) -> None:
+        """Cancels the navigation in progress in the tab"""
+        self.switch_to(handle)
+        self.__browser.execute_script("window.stop();")
+
+        if (started := self.__navigations.pop(handle, None)) and self.__proxy:
+            self.__proxies.report(self.__proxy, time.time() - started)
+
+    def is_loaded(self, handle: str) -> bool:
+        self.switch_to(handle)
+        loaded = self.__browser.execute_script(
+            "return document.readyState === 'complete' && !window.__stale;")
+
+        if loaded and (started := self.__navigations.pop(handle, None)):
+            if self.__proxy:
+                self.__proxies.report(
+                    self.__proxy, time.time() - started, self.response.code)
+        return loaded
 
     def __driver_ext(self) -> str:
         if platform == "darwin":
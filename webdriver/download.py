@@ -0,0 +1,143 @@
+import re
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Generator, List, TypeVar
+from urllib.parse import urljoin
+from uuid import uuid4
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+from urllib3.util.retry import Retry
+
+from webdriver.watchdog import DeadlineExceeded
+
+T = TypeVar("T")
+
+# Viewer pages (e.g. IEEE's stamp.jsp) embed the actual PDF
+EMBEDDED_PDF = re.compile(
+    r"<(?:iframe|embed)[^>]+src=[\"'](?P<src>[^\"']+)[\"']", re.IGNORECASE)
+# Content types a PDF may be served with, the file must still start with %PDF
+PDF_TYPES = ("application/pdf", "application/x-pdf", "application/octet-stream",
+             "binary/octet-stream")
+
+
+def shutdown(response: requests.Response) -> None:
+    """Unblocks a read in progress on the response, from another thread"""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    try:
+        if sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    response.close()
+
+
+class Downloader:
+    """
+    Fetches files over HTTP in a background pool, with the browser's cookies
+    and user agent, while the browser moves on to the next page
+    - Each file must be fetched within `timeout` seconds in total, so a
+      worker is never held longer than that
+    - Only PDFs are saved, other responses fail the future
+    """
+
+    def __init__(self, download_dir: Path, workers: int = 4,
+                 timeout: int = 60):
+        self.__download_dir = Path(download_dir).joinpath("http")
+        self.__download_dir.mkdir(parents=True, exist_ok=True)
+        self.__timeout = timeout
+
+        adapter = HTTPAdapter(
+            pool_connections=workers, pool_maxsize=workers,
+            max_retries=Retry(total=2, backoff_factor=1,
+                              status_forcelist=[500, 502, 503, 504]))
+
+        self.__session = requests.Session()
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+
+        self.__pool = ThreadPoolExecutor(workers)
+
+    def __del__(self):
+        self.__pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, url: str, then: Callable[[Path], T],
+               cookies: List[Dict] = [], headers: Dict[str, str] = {},
+               proxy: str = None) -> Future:
+        """
+        Downloads `url` and calls `then` with the path of the file,
+        which is removed afterwards. The future holds the result of `then`.
+        """
+        jar = RequestsCookieJar()
+        for cookie in cookies:
+            jar.set(cookie["name"], cookie["value"],
+                    domain=cookie.get("domain"), path=cookie.get("path", "/"))
+
+        proxies = {"http": proxy, "https": proxy} if proxy else None
+
+        return self.__pool.submit(
+            self.__fetch, url, then, jar, headers, proxies)
+
+    def __fetch(self, url: str, then: Callable[[Path], T],
+                cookies: RequestsCookieJar, headers: Dict[str, str],
+                proxies: Dict[str, str]) -> T:
+        deadline = time.monotonic() + self.__timeout
+        responses: List[requests.Response] = []
+
+        def get(url: str) -> requests.Response:
+            response = self.__session.get(
+                url, cookies=cookies, headers=headers, proxies=proxies,
+                timeout=max(deadline - time.monotonic(), 1), stream=True)
+            responses.append(response)
+            response.raise_for_status()
+            return response
+
+        def read(response: requests.Response) -> Generator[bytes, None, None]:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                if time.monotonic() > deadline:
+                    raise DeadlineExceeded("download", self.__timeout)
+                yield chunk
+
+        # The requests timeout is per socket read, shutting the connections
+        # down at the deadline also stops a server sending a byte at a time
+        timer = threading.Timer(
+            self.__timeout, lambda: [shutdown(i) for i in responses])
+        timer.daemon = True
+        timer.start()
+
+        path = self.__download_dir.joinpath(f"{uuid4().hex}.pdf")
+        try:
+            try:
+                response = get(url)
+                if "html" in response.headers.get("Content-Type", ""):
+                    html = b"".join(read(response)).decode(
+                        response.encoding or "utf-8", errors="replace")
+                    if not (match := EMBEDDED_PDF.search(html)):
+                        raise ValueError(f"No PDF found at {url}")
+                    response = get(urljoin(response.url, match.group("src")))
+
+                content_type = response.headers.get("Content-Type", "")
+                if content_type and not content_type.startswith(PDF_TYPES):
+                    raise ValueError(f"Not a PDF at {url} ({content_type})")
+
+                with open(path, "wb") as f:
+                    for chunk in read(response):
+                        if not f.tell() and not chunk.startswith(b"%PDF"):
+                            raise ValueError(f"Not a PDF at {url}")
+                        f.write(chunk)
+            except Exception as e:
+                if time.monotonic() >= deadline:
+                    raise DeadlineExceeded("download", self.__timeout) from e
+                raise
+            finally:
+                timer.cancel()
+                for response in responses:
+                    response.close()
+
+            return then(path)
+        finally:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import requests
+
+THROTTLE_CODES = (403, 429, 503)
+
+
+class Proxy:
+    def __init__(self, url: str):
+        self.url: str = url
+
+        self.latency: float = None  # Moving average, in seconds
+        self.error_rate: float = 0.0  # Moving average
+        self.requests: int = 0
+        self.errors: int = 0
+        self.throttles: int = 0
+
+        self.first_used: float = None
+        self.evicted_until: float = 0.0
+        self.evictions: int = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.evicted_until <= time.time()
+
+    @property
+    def score(self) -> float:
+        latency = self.latency if self.latency is not None else 1.0
+        return (1.0 - self.error_rate) / (1.0 + latency)
+
+    @property
+    def throughput(self) -> float:  # Successful requests per minute
+        if not self.first_used:
+            return 0.0
+        elapsed = max(time.time() - self.first_used, 1.0)
+        return 60 * (self.requests - self.errors) / elapsed
+
+    def asdict(self) -> Dict:
+        return dict(
+            url=self.url,
+            requests=self.requests,
+            errors=self.errors,
+            throttles=self.throttles,
+            latency=self.latency,
+            error_rate=self.error_rate,
+            throughput=self.throughput,
+            healthy=self.healthy)
+
+
+class ProxyPool:
+    """
+    Pool of upstream proxies assigned to WebDriver sessions
+    - Proxies are picked at random, weighted by their health score
+      (latency and error rate moving averages)
+    - Throttled (403, 429, 503), slow or failing proxies are evicted for
+      `cooldown` seconds, doubled on each consecutive eviction
+    - Evicted proxies are probed against `probe_url` before coming back
+    """
+
+    def __init__(self, proxies: Iterable[str], cooldown: int = 300,
+                 max_error_rate: float = 0.5, max_latency: float = 30.0,
+                 min_requests: int = 3, alpha: float = 0.3,
+                 probe_url: str = "https://doi.org", probe_timeout: int = 10):
+        self.__proxies: List[Proxy] = [Proxy(url) for url in proxies]
+        if not self.__proxies:
+            raise ValueError("A proxy pool needs at least one proxy")
+
+        self.__cooldown = cooldown
+        self.__max_error_rate = max_error_rate
+        self.__max_latency = max_latency
+        self.__min_requests = min_requests
+        self.__alpha = alpha
+
+        self.__probe_url = probe_url
+        self.__probe_timeout = probe_timeout
+
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: Path, **kwargs) -> "ProxyPool":
+        with open(path, "r", encoding="utf-8") as f:
+            proxies = [line.strip() for line in f]
+
+        return cls([
+            proxy for proxy in proxies
+            if proxy and not proxy.startswith("#")], **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.__proxies)
+
+    def acquire(self) -> Proxy:
+        with self.__lock:
+            healthy = [proxy for proxy in self.__proxies if proxy.healthy]
+
+        for proxy in [p for p in healthy if p.evictions]:
+            if not self.probe(proxy):
+                healthy.remove(proxy)
+
+        if not healthy:  # Every proxy is evicted, use the next to recover
+            return min(self.__proxies, key=lambda p: p.evicted_until)
+
+        return random.choices(
+            healthy, weights=[max(p.score, 1e-3) for p in healthy])[0]
+
+    def probe(self, proxy: Proxy) -> bool:
+        try:
+            response = requests.head(
+                self.__probe_url, timeout=self.__probe_timeout,
+                proxies={"http": proxy.url, "https": proxy.url})
+            passed = response.status_code < 400
+        except requests.RequestException:
+            passed = False
+
+        with self.__lock:
+            if passed:
+                proxy.evictions = 0
+            else:
+                self.__evict(proxy)
+        return passed
+
+    def report(self, proxy: Proxy, latency: float,
+               status_code: int = None) -> None:
+        error = status_code is None or status_code >= 400
+        throttled = status_code in THROTTLE_CODES
+
+        with self.__lock:
+            proxy.first_used = proxy.first_used or time.time() - latency
+            proxy.requests += 1
+            proxy.errors += error
+            proxy.throttles += throttled
+
+            a = self.__alpha
+            proxy.error_rate = (1 - a) * proxy.error_rate + a * error
+            proxy.latency = latency if proxy.latency is None else (
+                (1 - a) * proxy.latency + a * latency)
+
+            if throttled or (proxy.requests >= self.__min_requests and (
+                    proxy.error_rate > self.__max_error_rate or
+                    proxy.latency > self.__max_latency)):
+                self.__evict(proxy)
+
+    def __evict(self, proxy: Proxy) -> None:
+        proxy.evicted_until = time.time() + \
+            self.__cooldown * 2 ** min(proxy.evictions, 6)
+        proxy.evictions += 1
+
+        # Give the proxy a fresh start once it passes the probe
+        proxy.error_rate = 0.0
+        proxy.latency = None
+
+    def stats(self) -> List[Dict]:
+        with self.__lock:
+            return [proxy.asdict() for proxy in self.__proxies]
@@ -1,11 +1,50 @@
 from selenium.webdriver.remote.webelement import WebElement
 import re
 from html import unescape
+from typing import List
+
+TAG = re.compile(r"<[^<\x00]+?>")
+SPACES = re.compile(r"\s+")
+SEPARATOR = "\x00"  # Between the strings of a batch, neither a tag nor a space
+
+
+def html_to_text(html: List[str]) -> List[str]:
+    """
+    Plain text of each HTML string, with whitespace collapsed
+    - The batch is cleaned as a single string, so each precompiled pattern
+      runs once instead of once per string
+    """
+    if not html:
+        return []
+
+    text = unescape(SPACES.sub(" ", TAG.sub("", SEPARATOR.join(html))))
+    return [i.strip() for i in text.split(SEPARATOR)]
+
+
+def get_inner_html(elements: List[WebElement]) -> List[str]:
+    """innerHTML of all the elements in a single WebDriver call"""
+    if not elements:
+        return []
+    return elements[0].parent.execute_script(
+        "return arguments[0].map(el => el.innerHTML);", elements)
+
+
+def get_inner_text(elements: List[WebElement]) -> List[str]:
+    """
+    Rendered text of all the elements in a single call
+    - As WebElement.text, elements not rendered (e.g. display:none, where
+      innerText falls back to textContent) give ""
+    """
+    if not elements:
+        return []
+    return elements[0].parent.execute_script(
+        "return arguments[0].map(el =>"
+        " el.getClientRects().length ? el.innerText.trim() : '');", elements)
+
+
+def get_text_from_elements(elements: List[WebElement]) -> List[str]:
+    return html_to_text(get_inner_html(elements))
 
 
 def get_text_from_element(el: WebElement) -> str:
-    s = el.get_attribute("innerHTML").strip()
-    s = re.sub(r"<[^<]+?>", r"", s)
-    s = re.sub(r"\s+", r" ", s)
-    s = unescape(s)
-    return s
+    return get_text_from_elements([el])[0]
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Seconds allowed per DOI, and for the page load and PDF download stages
+Budget = namedtuple("Budget", ["total", "load", "download"],
+                    defaults=[300, 120, 60])
+
+
+class DeadlineExceeded(TimeoutError):
+    def __init__(self, stage: str, seconds: float):
+        super().__init__(f"Timed out during {stage} ({seconds}s budget)")
+        self.stage = stage
+        self.seconds = seconds
+
+
+class Watchdog:
+    """
+    Background thread enforcing the deadline of the block being watched
+    - When the deadline passes `on_expire` is called (e.g. killing the
+      browser, so any call blocked on it fails right away)
+    - The watched block then raises DeadlineExceeded, unless it completed
+      meanwhile: its result is kept and `expired` tells that the deadline
+      passed (e.g. the browser must be restarted)
+    """
+
+    def __init__(self, on_expire: Callable[[], None]):
+        self.__on_expire = on_expire
+
+        self.__cond = threading.Condition()
+        self.__deadline: float = None
+        self.__stage: str = None
+        self.__expired: bool = False
+
+        threading.Thread(target=self.__run, daemon=True).start()
+
+    @property
+    def expired(self) -> bool:
+        return self.__expired
+
+    def stage(self, stage: str) -> None:
+        with self.__cond:
+            self.__stage = stage
+
+    @contextmanager
+    def watch(self, seconds: float, stage: str) -> None:
+        with self.__cond:
+            self.__deadline = time.monotonic() + seconds
+            self.__stage = stage
+            self.__expired = False
+            self.__cond.notify()
+
+        try:
+            yield self
+        except Exception as e:
+            if self.__expired:
+                raise DeadlineExceeded(self.__stage, seconds) from e
+            raise
+        finally:
+            with self.__cond:
+                self.__deadline = None
+                self.__cond.notify()
+
+    def __run(self) -> None:
+        while True:
+            with self.__cond:
+                while self.__deadline is None or (
+                        remaining := self.__deadline - time.monotonic()) > 0:
+                    self.__cond.wait(
+                        None if self.__deadline is None else remaining)
+
+                self.__deadline = None
+                self.__expired = True
+
+            try:
+                self.__on_expire()
+            except Exception:  # Later deadlines must still be enforced
+                logger.exception("Watchdog callback failed")